@@ -2,6 +2,13 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import math
+import hashlib
+import io
+
+from modules.carrega import llegir_csv as llegir_csv_tipat, ESQUEMA_SOL_LICITANTS
+
+# Entrades màximes de cada memòria cau (les menys usades recentment surten primer)
+MAX_ENTRADES_CACHE = 16
 
 # Funció per al sorteig amb colles (lògica existent)
 def assignar_isards_sorteig_csv(df: pd.DataFrame, total_captures: int, seed: int = None) -> pd.DataFrame:
@@ -81,41 +88,66 @@ def assignar_captura_csv(df: pd.DataFrame, tipus_captures: list, quantitats: dic
         safe = tipus.replace('+','_')
         col_name = f'Adjudicats_Tipus{i}_{safe}'
         df[col_name] = 0
-    # Assignació per tipus en ordre
+    # Assignació per tipus en ordre, per blocs: cada nivell d'Adjudicats_acumulats
+    # s'ordena un sol cop (prioritat i atzar) i se n'adjudiquen tantes places com
+    # calgui, en lloc d'una captura per iteració.
+    adjudicats = df['Adjudicats'].to_numpy(dtype=float).copy()
+    acumulats = adjudicats + df['Resultat_sorteigs_mateixa_sps'].to_numpy(dtype=float)
+    prioritat = df['Prioritat'].to_numpy(dtype=float)
     for i, tipus in enumerate(tipus_captures, start=1):
-        target = quantitats.get(tipus, 0)
-        assigned = 0
+        pendents = quantitats.get(tipus, 0)
         safe = tipus.replace('+','_')
         col_name = f'Adjudicats_Tipus{i}_{safe}'
-        while assigned < target:
-            df['Adjudicats_acumulats'] = df['Adjudicats'] + df['Resultat_sorteigs_mateixa_sps']
-            min_acc = df['Adjudicats_acumulats'].min()
-            # Filtrar candidats amb captures assignades mínimes ja que són prioritaris
-            candidates = df[df['Adjudicats_acumulats'] == min_acc].copy()
-            candidates['rand'] = rng.random(size=len(candidates))
-            # Mentre hi han candidts sense captures assignades en cap dels sortejos 
+        per_tipus = np.zeros(len(df), dtype=int)
+        while pendents > 0:
+            min_acc = np.nanmin(acumulats)
+            # Candidats amb captures assignades mínimes ja que són prioritaris
+            candidats = np.flatnonzero(acumulats == min_acc)
+            if len(candidats) == 0:
+                break
+            rand = rng.random(size=len(candidats))
+            # Mentre hi han candidats sense captures assignades en cap dels sortejos
             # se'ls assigna per prioritat i aleatoriament després.
             if min_acc == 0:
-                ordered = candidates.sort_values(by=['Prioritat','rand'],ascending=[True,True])
-            # Si tots tenen com a mínim una captura assignada, 
+                ordre = np.lexsort((rand, prioritat[candidats]))
+            # Si tots tenen com a mínim una captura assignada,
             # s'assigna aleatoriament, tots estan a la mateixa prioritat.
             else:
-                ordered = candidates.sort_values(by=['rand'])
-            idx = ordered.index[0]
-            df.at[idx, 'Adjudicats'] += 1
-            df.at[idx, col_name] += 1
-            assigned += 1
+                ordre = np.argsort(rand)
+            triats = candidats[ordre[:pendents]]
+            adjudicats[triats] += 1
+            acumulats[triats] += 1
+            per_tipus[triats] += 1
+            pendents -= len(triats)
+        df[col_name] = per_tipus
+    df['Adjudicats'] = adjudicats.astype(df['Adjudicats'].dtype)
     df['Nou_Resultat_sorteigs_mateixa_sps'] = df['Resultat_sorteigs_mateixa_sps'] + df['Adjudicats']
     # Calcular nova prioritat i anys sense captura
-    df['nova_prioritat'] = df['Adjudicats'].apply(lambda x: 4 if x > 1 else 2)
-    df['nou_anys_sense_captura'] = df.apply(
-        lambda r: 0 if r['Adjudicats'] == 1 else r['anys_sense_captura'] + 1,
-        axis=1
+    df['nova_prioritat'] = np.where(df['Adjudicats'] > 1, 4, 2)
+    df['nou_anys_sense_captura'] = np.where(
+        df['Adjudicats'] == 1, 0, df['anys_sense_captura'] + 1
     )
     if 'Adjudicats_acumulats' in df.columns:
         df.drop(columns=['Adjudicats_acumulats'], inplace=True)
     return df
 
+# Memòria cau: la clau és el hash del fitxer pujat (més configuració i llavor),
+# de manera que els reruns de Streamlit no tornen a llegir ni a sortejar.
+# Els arguments amb '_' no formen part de la clau.
+@st.cache_data(max_entries=MAX_ENTRADES_CACHE, show_spinner=False)
+def llegir_csv(digest: str, _contingut: bytes) -> pd.DataFrame:
+    return llegir_csv_tipat(io.BytesIO(_contingut), ESQUEMA_SOL_LICITANTS)
+
+@st.cache_data(max_entries=MAX_ENTRADES_CACHE, show_spinner=False)
+def sorteig_isard_cache(digest: str, _df: pd.DataFrame, total_captures: int, seed: int):
+    result = assignar_isards_sorteig_csv(_df, total_captures, seed)
+    return result, result.to_csv(index=False)
+
+@st.cache_data(max_entries=MAX_ENTRADES_CACHE, show_spinner=False)
+def sorteig_tipus_cache(digest: str, _df: pd.DataFrame, tipus_captures: tuple, quantitats: tuple, seed: int):
+    result = assignar_captura_csv(_df, list(tipus_captures), dict(quantitats), seed)
+    return result, result.to_csv(index=False)
+
 # Streamlit UI
 st.title("App Sorteig Pla de Caça")
 # Instruccions d'ús en català
@@ -141,9 +173,12 @@ unidad = st.selectbox(
 
 # 3. Carrega CSV i vista prèvia
 df = None
+digest = None
 file = st.file_uploader("CSV sol·licitants", type='csv')
 if file:
-    df = pd.read_csv(file, sep=';')
+    contingut = file.getvalue()
+    digest = hashlib.sha256(contingut).hexdigest()
+    df = llegir_csv(digest, contingut)
     st.subheader("Previsualització de sol·licitants")
     st.dataframe(df)
 
@@ -197,7 +232,12 @@ if st.button("Executar sorteig"):
                 st.warning("Cal especificar el nombre de captures.")
                 st.stop()
             try:
-                result = assignar_isards_sorteig_csv(df, total_cap, seed)
+                # Sense llavor cada clic ha de ser un sorteig nou: no es desa
+                if seed is None:
+                    result = assignar_isards_sorteig_csv(df, total_cap, seed)
+                    csv = result.to_csv(index=False)
+                else:
+                    result, csv = sorteig_isard_cache(digest, df, int(total_cap), int(seed))
             except ValueError as e:
                 st.error(str(e))
                 st.stop()
@@ -208,7 +248,14 @@ if st.button("Executar sorteig"):
                 tipus_captures.append(val)
                 quantitats[val] = conf['qty']
             try:
-                result = assignar_captura_csv(df, tipus_captures, quantitats, seed)
+                if seed is None:
+                    result = assignar_captura_csv(df, tipus_captures, quantitats, seed)
+                    csv = result.to_csv(index=False)
+                else:
+                    result, csv = sorteig_tipus_cache(
+                        digest, df, tuple(tipus_captures),
+                        tuple(quantitats.items()), int(seed)
+                    )
             except ValueError as e:
                 st.error(str(e))
                 st.stop()
@@ -217,7 +264,7 @@ if st.button("Executar sorteig"):
         st.dataframe(result)
         st.download_button(
             'Descarregar CSV',
-            result.to_csv(index=False),
+            csv,
             file_name=f"sorteig_{especie}_{unidad}.csv"
         )
 else:
@@ -1,4 +1,32 @@
+import argparse
+import os
+
 from modules.analisi import generar_heatmaps_i_grafics
+from modules.historial import particions_historial, ruta_historial
 
 if __name__ == '__main__':
-    generar_heatmaps_i_grafics('data/historial_6_anys.csv')
+    parser = argparse.ArgumentParser(description="Genera les figures dels historials desats.")
+    parser.add_argument('--historial', default=os.path.join('data', 'historial'),
+                        help="Magatzem Parquet d'historials (per defecte, el del pipeline) "
+                             "o un CSV d'historial en format antic.")
+    parser.add_argument('--escenari', default=None,
+                        help="Escenari del magatzem (per defecte, tots els que hi ha).")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Llavor del magatzem (per defecte, totes les que hi ha).")
+    parser.add_argument('--output', default='figures', help="Carpeta de les figures.")
+    args = parser.parse_args()
+
+    if os.path.isfile(args.historial):
+        generar_heatmaps_i_grafics(args.historial, output_folder=args.output)
+    else:
+        particions = [(e, s) for e, s in particions_historial(args.historial)
+                      if args.escenari in (None, e) and args.seed in (None, s)]
+        if not particions:
+            raise SystemExit(f"❌ No hi ha cap historial triat a {args.historial} (executa main_pipeline.py)")
+        for escenari, seed in particions:
+            # Amb diverses llavors per escenari, cada una té la seva carpeta
+            carpeta = os.path.join(args.output, escenari)
+            if sum(e == escenari for e, _ in particions) > 1:
+                carpeta = os.path.join(carpeta, f"seed={seed}")
+            generar_heatmaps_i_grafics(ruta_historial(args.historial, escenari, seed), output_folder=carpeta)
+            print(f"✅ Figures de {escenari} (seed={seed}) a {carpeta}")
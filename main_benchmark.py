@@ -0,0 +1,55 @@
+# main_benchmark.py
+
+import argparse
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+
+from modules.benchmark import (
+    MIDES, RATIS, FASES, TOLERANCIA,
+    executar_benchmark, desar_baseline, carregar_baseline, comparar_amb_baseline
+)
+
+BASELINE = os.path.join('benchmarks', 'baseline.json')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Mesura el sorteig, la simulació, les figures i l'informe a diferents mides."
+    )
+    parser.add_argument('--mides', type=int, nargs='+', default=list(MIDES),
+                        help="Caçadors totals de cada població (per defecte 1000 36000 360000).")
+    parser.add_argument('--ratis', type=int, nargs='+', default=list(RATIS),
+                        help="Caçadors per captura (per defecte 5 10 20).")
+    parser.add_argument('--fases', nargs='+', choices=FASES, default=list(FASES),
+                        help="Fases a mesurar.")
+    parser.add_argument('--repeticions', type=int, default=1,
+                        help="Execucions de cada cas; es guarda el millor temps.")
+    parser.add_argument('--seed', type=int, default=0, help="Llavor de les poblacions i els sortejos.")
+    parser.add_argument('--baseline', default=BASELINE, help="Fitxer JSON de referència.")
+    parser.add_argument('--desar-baseline', action='store_true',
+                        help="Desa els resultats com a nova referència en lloc de comparar-los.")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help="Increment relatiu tolerat abans de marcar una regressió (0.25 = 25%%).")
+    args = parser.parse_args()
+
+    benchmark = executar_benchmark(args.mides, args.ratis, args.fases, args.repeticions, args.seed)
+
+    if args.desar_baseline or not os.path.exists(args.baseline):
+        desar_baseline(benchmark, args.baseline)
+        for cas, segons in benchmark['resultats'].items():
+            print(f"{cas:<32} {segons:9.3f} s")
+        print(f"✅ Referència desada a {args.baseline}")
+        sys.exit(0)
+
+    comparacio = comparar_amb_baseline(benchmark, carregar_baseline(args.baseline), args.tolerancia)
+    print(comparacio.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+    regressions = comparacio[comparacio['regressio']]
+    if len(regressions):
+        print(f"\n❌ {len(regressions)} regressions de més del {args.tolerancia:.0%}: "
+              f"{', '.join(regressions['cas'])}")
+        sys.exit(1)
+    print("\n✅ Cap regressió respecte de la referència")
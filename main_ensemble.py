@@ -0,0 +1,21 @@
+import os
+
+from modules.montecarlo import simular_ensemble
+
+if __name__ == '__main__':
+    resultats = simular_ensemble(
+        initial_csv='sorteig.csv',
+        captures_per_year_list=[150] * 6,
+        n_replicas=200,
+        seed=42,
+        min_colla_size=8,
+        max_colla_size=20
+    )
+    os.makedirs('reports', exist_ok=True)
+    resultats['captures'].to_csv('reports/ensemble_captures.csv', index=False)
+    resultats['ratxes'].to_csv('reports/ensemble_ratxes.csv', index=False)
+    resultats['equitat'].to_csv('reports/ensemble_equitat.csv', index=False)
+    resultats['bretxa'].to_csv('reports/ensemble_bretxa.csv', index=False)
+    print(resultats['captures'].to_string(index=False))
+    print(resultats['equitat'].to_string(index=False))
+    print("✅ Estadístiques de l'ensemble desades a reports/")
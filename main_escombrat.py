@@ -0,0 +1,28 @@
+import argparse
+import json
+import os
+
+from modules.escombrat import GRAELLA_PER_DEFECTE, expandir_graella, executar_escombrat
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Escombrat de paràmetres: simula totes les variants d'una graella.")
+    parser.add_argument('--graella', default=None,
+                        help="JSON amb la graella (colla, captures, rotacio, poblacio, seeds); "
+                             "per defecte, GRAELLA_PER_DEFECTE.")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help="Variants executades en paral·lel (per defecte, tots els nuclis).")
+    parser.add_argument('--output', default=os.path.join('reports', 'escombrat.csv'),
+                        help="CSV de la taula comparativa.")
+    parser.add_argument('--reprendre', action='store_true',
+                        help="No repeteix les variants que ja són a --output sense error.")
+    args = parser.parse_args()
+
+    graella = GRAELLA_PER_DEFECTE
+    if args.graella:
+        with open(args.graella, 'r', encoding='utf-8') as f:
+            graella = json.load(f)
+
+    variants = expandir_graella(graella)
+    print(f"🧮 {len(variants)} variants a simular amb {args.jobs} processos")
+    taula = executar_escombrat(variants, jobs=args.jobs, output_csv=args.output, reprendre=args.reprendre)
+    print(taula.drop(columns=['nom']).to_string(index=False))
@@ -1,10 +1,25 @@
-from modules.generador import generar_dades_inicials
+import argparse
+
+from modules.generador import generar_dades_inicials, MIDA_BLOC
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Genera una població inicial de caçadors (CSV).")
+    parser.add_argument('--colla', type=int, default=175, help="Caçadors en colles (modalitat A).")
+    parser.add_argument('--individuals', type=int, default=190, help="Caçadors individuals (modalitat B).")
+    parser.add_argument('--min-colla', type=int, default=8, help="Mida mínima de colla.")
+    parser.add_argument('--max-colla', type=int, default=20, help="Mida màxima de colla.")
+    parser.add_argument('--seed', type=int, default=None, help="Llavor (per defecte, aleatòria).")
+    parser.add_argument('--mida-bloc', type=int, default=MIDA_BLOC, help="Files escrites per bloc.")
+    parser.add_argument('--output', default='data/sorteig.csv', help="Ruta del CSV de sortida.")
+    args = parser.parse_args()
+
     generar_dades_inicials(
-        total_cacadors_colla=175,
-        total_individuals=190,
-        min_colla_size=8,
-        max_colla_size=20,
-        output_path='data/sorteig.csv'  # <--- ara passa la ruta
+        total_cacadors_colla=args.colla,
+        total_individuals=args.individuals,
+        min_colla_size=args.min_colla,
+        max_colla_size=args.max_colla,
+        output_path=args.output,  # <--- ara passa la ruta
+        seed=args.seed,
+        mida_bloc=args.mida_bloc,
+        retornar_df=False
     )
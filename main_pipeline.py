@@ -1,86 +1,201 @@
 # main_pipeline.py
 
+import argparse
 import os
 import random
-import pandas as pd
+import traceback
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')  # figures sense pantalla, també dins dels processos treballadors
 
 from modules.generador import generar_dades_inicials
 from modules.simulacio import simular_6_anys_variable
-from modules.analisi import generar_heatmaps_i_grafics
+from modules.analisi import generar_heatmaps_i_grafics, resumir_historial, PERFILS_FIGURES
+from modules.historial import desar_historial, ruta_historial
+from modules import cache
 from modules.report import generar_report_escenari, combinar_markdowns
 from modules.config_escenaris import escenaris
 
-# Assegurar carpetes
-os.makedirs('data', exist_ok=True)
-os.makedirs('figures', exist_ok=True)
-os.makedirs('reports', exist_ok=True)
+# Memòria cau de resultats per escenari (historial, figures i informe)
+CACHE_ESCENARIS = os.path.join('.cache', 'escenaris')
+
+
+def llavor_escenari(seed: int, nom: str) -> int:
+    """
+    Llavor pròpia de cada escenari, derivada del seu nom: no canvia si
+    s'afegeixen, s'eliminen o es reordenen escenaris a config_escenaris.
+    """
+    return seed + zlib.crc32(nom.encode('utf-8'))
+
+
+def _generar_report(escenari: dict, index_escenari: int, hist_path: str, resum: dict = None,
+                    format_figures: str = 'png'):
+    generar_report_escenari(
+        nom_escenari=escenari['nom'],
+        min_colla_size=escenari['min_colla'],
+        captures_per_any=escenari['captures_per_any'],
+        new_hunters_per_year=escenari.get('new_hunters_per_year', 0),
+        retired_hunters_per_year=escenari.get('retired_hunters_per_year', 0),
+        index_escenari=index_escenari,
+        hist_path=hist_path,
+        resum=resum,
+        format_figures=format_figures
+    )
+
+
+def executar_escenari(
+    escenari: dict,
+    index_escenari: int,
+    seed: int = 42,
+    cache_dir: str = None,
+    versio: str = None,
+    perfil_figures: str = 'final',
+    jobs_figures: int = 1
+) -> str:
+    """
+    Executa un escenari complet (dades, simulació, figures i informe) dins de la
+    seva pròpia carpeta data/<nom>/, de manera que diversos escenaris poden
+    córrer alhora sense trepitjar-se els fitxers. L'historial es desa al
+    magatzem Parquet data/historial/, a la partició escenari=<nom>/seed=<seed>.
+
+    Amb `cache_dir`, les dades, l'historial i les figures es desen indexats per
+    un hash de l'escenari, els paràmetres del generador, la llavor i la versió
+    del codi; si l'escenari no ha canviat es copien de la memòria cau sense
+    recalcular-los. La posició de l'escenari no forma part de la clau: només
+    numera l'informe, que es torna a escriure (és barat) a partir de l'historial.
+
+    Les figures es dibuixen amb el perfil `perfil_figures` ('preview' o 'final')
+    i, si `jobs_figures` > 1, en paral·lel.
+    """
+    carpeta_dades = os.path.join('data', escenari['nom'])
+    hist_path = ruta_historial(os.path.join('data', 'historial'), escenari['nom'], seed)
+    carpeta_figures = os.path.join('figures', escenari['nom'])
+    format_figures = PERFILS_FIGURES[perfil_figures]['format']
+    llavor = llavor_escenari(seed, escenari['nom'])
+
+    params_generador = {
+        'total_cacadors_colla': escenari.get('total_cacadors_colla', 175),
+        'total_individuals': escenari.get('total_individuals', 190),
+        'min_colla_size': escenari.get('min_colla', 8),
+        'max_colla_size': escenari.get('max_colla', 20),
+        'seed': llavor
+    }
+    resultats = {'dades': carpeta_dades, 'historial': hist_path, 'figures': carpeta_figures}
+
+    if cache_dir is not None:
+        clau = cache.clau_cache(escenari=escenari, generador=params_generador, seed=seed,
+                                figures=PERFILS_FIGURES[perfil_figures],
+                                versio=versio or cache.versio_codi([__file__]))
+        if cache.recuperar(cache_dir, clau, resultats):
+            print(f"♻️ Escenari sense canvis, recuperat de la memòria cau: {escenari['nom']}")
+            _generar_report(escenari, index_escenari, hist_path, format_figures=format_figures)
+            return escenari['nom']
 
-# Anem guardant noms dels escenaris
-noms_escenaris = []
-index_escenari = 0
-# Pipeline principal
-for escenari in escenaris:
     print(f"\n🏹 Simulant: {escenari['nom']}...\n")
-    index_escenari += 1
+    # Cada escenari té el seu propi estat aleatori, independent de l'ordre
+    # d'execució, de la posició a config_escenaris i del procés on s'executi.
+    random.seed(llavor)
+
+    os.makedirs(carpeta_dades, exist_ok=True)
+
     # 1. Generar dades inicials
-    generar_dades_inicials(
-        total_cacadors_colla=escenari.get('total_cacadors_colla', 175),
-        total_individuals=escenari.get('total_individuals', 190),
-        min_colla_size=escenari.get('min_colla', 8),
-        max_colla_size=escenari.get('max_colla', 20),
-        output_path='data/sorteig.csv'
+    df_inicial = generar_dades_inicials(
+        output_path=os.path.join(carpeta_dades, 'sorteig.csv'),
+        **params_generador
     )
 
     # 2. Simulació
     captures = escenari['captures_per_any']
     captures_per_year = [random.randint(captures[0], captures[1]) for _ in range(6)]
-    simular_6_anys_variable(
-        initial_csv='sorteig.csv',
+    df_hist = simular_6_anys_variable(
+        initial_csv=df_inicial,
         min_colla_size=escenari.get('min_colla', 8),
         max_colla_size=escenari.get('max_colla', 20),
         captures_per_year_list=captures_per_year,
-        seed=42,
+        seed=seed,
         new_hunters_range=escenari['new_hunters_per_year'],
-        retired_hunters_range=escenari['retired_hunters_per_year']
+        retired_hunters_range=escenari['retired_hunters_per_year'],
+        output_csv=None
     )
+    hist_path = desar_historial(df_hist, os.path.join('data', 'historial'), escenari['nom'], seed)
 
-    # 3. Crear figures
-    carpeta_figures = os.path.join('figures', escenari['nom'])
-    generar_heatmaps_i_grafics(output_folder=carpeta_figures)
+    # 3. Resum per any i ratxes (un sol cop, en memòria) i figures
+    resum = resumir_historial(df_hist)
+    generar_heatmaps_i_grafics(file_path=hist_path, output_folder=carpeta_figures, resum=resum,
+                               perfil_figures=perfil_figures, jobs=jobs_figures)
 
     # 4. Generar informe per escenari
-    df_hist = pd.read_csv('data/historial_6_anys.csv')
-
-    # ➡️ Nova part: construir evolució any a any
-    evolucio_anys = []
-    for anyo in range(1, 7):
-        caçadors_total = len(df_hist[df_hist['any'] == anyo])
-        caçadors_colla = len(df_hist[(df_hist['any'] == anyo) & (df_hist['Modalitat'] == 'A')])
-        caçadors_individual = len(df_hist[(df_hist['any'] == anyo) & (df_hist['Modalitat'] == 'B')])
-        captures_adjudicades = df_hist[(df_hist['any'] == anyo) & (df_hist['adjudicats'] == 1)].shape[0]
-
-        evolucio_anys.append({
-            'any': anyo,
-            'cacadors_total': caçadors_total,
-            'cacadors_colla': caçadors_colla,
-            'cacadors_individual': caçadors_individual,
-            'captures_adjudicades': captures_adjudicades
-        })
-
-    # ➡️ Ara cridem la funció passant evolucio_anys
-    generar_report_escenari(
-        nom_escenari=escenari['nom'],
-        min_colla_size=escenari['min_colla'],
-        captures_per_any=captures,
-        new_hunters_per_year=escenari.get('new_hunters_per_year', 0),
-        retired_hunters_per_year=escenari.get('retired_hunters_per_year', 0),
-        index_escenari=index_escenari,
-    )
-    noms_escenaris.append(escenari['nom'])
+    _generar_report(escenari, index_escenari, hist_path, resum, format_figures)
+
+    if cache_dir is not None:
+        cache.desar(cache_dir, clau, resultats, meta={'escenari': escenari['nom'], 'seed': seed})
+    return escenari['nom']
+
+
+def main(jobs: int = 1, seed: int = 42, cache_dir: str = CACHE_ESCENARIS,
+         mida_maxima_cache: int = cache.MIDA_MAXIMA_CACHE,
+         perfil_figures: str = 'final', jobs_figures: int = None):
+    # Assegurar carpetes
+    os.makedirs('data', exist_ok=True)
+    os.makedirs('figures', exist_ok=True)
+    os.makedirs('reports', exist_ok=True)
+
+    # Pipeline principal: cada escenari és una tasca independent
+    fallits = {}
+    completats = set()
+    versio = cache.versio_codi([__file__]) if cache_dir is not None else None
+    # Nuclis que sobren quan hi ha menys escenaris en paral·lel que nuclis
+    if jobs_figures is None:
+        jobs_figures = max(1, (os.cpu_count() or 1) // max(jobs, 1))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futurs = {
+            executor.submit(executar_escenari, escenari, index, seed, cache_dir, versio,
+                            perfil_figures, jobs_figures): escenari['nom']
+            for index, escenari in enumerate(escenaris, start=1)
+        }
+        for futur in as_completed(futurs):
+            nom = futurs[futur]
+            try:
+                completats.add(futur.result())
+                print(f"✅ Escenari completat: {nom}")
+            except Exception:
+                fallits[nom] = traceback.format_exc()
+                print(f"❌ Escenari fallit: {nom}\n{fallits[nom]}")
+
+    if cache_dir is not None:
+        eliminades = cache.netejar(cache_dir, mida_maxima_cache)
+        if eliminades:
+            print(f"🧹 {len(eliminades)} entrades antigues eliminades de la memòria cau")
 
+    # 5. Combinar en un sol Markdown (en l'ordre de config_escenaris)
+    noms_escenaris = [e['nom'] for e in escenaris if e['nom'] in completats]
+    combinar_markdowns(noms_escenaris)
 
+    if fallits:
+        print(f"\n⚠️ Pipeline completat amb {len(fallits)} escenaris fallits: {', '.join(fallits)}\n")
+    else:
+        print("\n✅ Pipeline completat correctament!\n")
+    return fallits
 
-# 5. Combinar en un sol Markdown
-combinar_markdowns(noms_escenaris)
 
-print("\n✅ Pipeline completat correctament!\n")
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simula tots els escenaris i genera els informes.")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help="Nombre d'escenaris executats en paral·lel (per defecte, tots els nuclis).")
+    parser.add_argument('--seed', type=int, default=42, help="Llavor de la simulació.")
+    parser.add_argument('--sense-cache', action='store_true',
+                        help="Recalcula tots els escenaris sense llegir ni desar la memòria cau.")
+    parser.add_argument('--cache-max-mb', type=int, default=cache.MIDA_MAXIMA_CACHE // 1024**2,
+                        help="Mida màxima de la memòria cau en MB (s'eliminen les entrades menys usades).")
+    parser.add_argument('--perfil-figures', choices=sorted(PERFILS_FIGURES), default='final',
+                        help="'preview' (72 dpi, ràpid per iterar) o 'final' (300 dpi, per als informes).")
+    parser.add_argument('--jobs-figures', type=int, default=None,
+                        help="Processos per dibuixar les figures de cada escenari "
+                             "(per defecte, els nuclis que no fan servir els escenaris).")
+    args = parser.parse_args()
+    main(jobs=args.jobs, seed=args.seed,
+         cache_dir=None if args.sense_cache else CACHE_ESCENARIS,
+         mida_maxima_cache=args.cache_max_mb * 1024**2,
+         perfil_figures=args.perfil_figures, jobs_figures=args.jobs_figures)
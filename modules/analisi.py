@@ -3,86 +3,215 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+from concurrent.futures import ProcessPoolExecutor
 from matplotlib.colors import ListedColormap, BoundaryNorm
 from matplotlib.colorbar import ColorbarBase
 
-def generar_heatmaps_i_grafics(file_path='data/historial_6_anys.csv', output_folder='figures'):
-    os.makedirs(output_folder, exist_ok=True)
-    data = pd.read_csv(file_path)
-    data['captures_consecutives'] = 0
-
-    data = data.sort_values(by=['ID', 'any'])
-
-    previous_id = None
-    streak = 0
-    for idx, row in data.iterrows():
-        current_id = row['ID']
-        adjudicat = row.get('adjudicats', 0)
-        if current_id != previous_id:
-            streak = 1 if adjudicat == 1 else 0
-        else:
-            if adjudicat >0:
-                streak = max(1, streak + 1)
-            else:
-                streak = min(0, streak - 1)
-        data.at[idx, 'captures_consecutives'] = streak
-        previous_id = current_id
-
-    # Clamp captures consecutives
+from modules.historial import llegir_historial, compactar_historial
+from modules.equitat import metriques_equitat
+
+# A partir d'aquest nombre d'IDs el heatmap per cel·la és il·legible i molt lent
+MAX_IDS_HEATMAP_DETALLAT = 2000
+
+def calcular_captures_consecutives(data: pd.DataFrame) -> np.ndarray:
+    """
+    Calcula per a cada fila de l'historial la ratxa de l'ID fins a aquell any:
+    positiva (1, 2, 3...) si porta anys seguits amb captura i zero o negativa
+    (0, -1, -2...) si en porta sense.
+
+    Treballa per trams: ordena per ID i any, marca on comença cada tram de
+    valors iguals i compta la posició dins del tram, sense bucles Python. El
+    primer any d'un ID només compta com a captura si adjudicats == 1.
+
+    Retorna un array alineat amb les files de `data` (en el seu ordre).
+    """
+    ordre = np.lexsort((data['any'].to_numpy(), data['ID'].to_numpy()))
+    ids = data['ID'].to_numpy()[ordre]
+    adjudicats = data['adjudicats'].to_numpy()[ordre]
+
+    nou_id = np.r_[True, ids[1:] != ids[:-1]]
+    captura = np.where(nou_id, adjudicats == 1, adjudicats > 0)
+    inici_tram = nou_id | np.r_[True, captura[1:] != captura[:-1]]
+    tram = np.cumsum(inici_tram) - 1
+    posicio = np.arange(len(ids)) - np.flatnonzero(inici_tram)[tram] + 1
+
+    ratxa = np.empty(len(ids), dtype=np.int64)
+    ratxa[ordre] = np.where(captura, posicio, -(posicio - 1))
+    return ratxa
+
+
+def resum_per_any(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Taula d'evolució per any amb una sola agregació agrupada: captures
+    (suma d'adjudicats) i caçadors totals, de colla (A) i individuals (B).
+    """
+    per_modalitat = (data.groupby(['any', 'Modalitat'], observed=True)['adjudicats']
+                         .agg(['size', 'sum'])
+                         .unstack('Modalitat', fill_value=0))
+    resum = pd.DataFrame({
+        'captures': per_modalitat['sum'].sum(axis=1),
+        'cacadors_total': per_modalitat['size'].sum(axis=1),
+        'cacadors_colla': per_modalitat['size'].get('A', 0),
+        'cacadors_individual': per_modalitat['size'].get('B', 0),
+    })
+    resum.index = resum.index.astype(int)
+    return resum.rename_axis('any').reset_index()
+
+
+def resumir_historial(data: pd.DataFrame) -> dict:
+    """
+    Resum de l'historial que comparteixen les figures i l'informe, calculat
+    un sol cop (i en memòria) per escenari:
+
+        - 'dades': historial ordenat per ID i any amb la ratxa de cada fila
+          ('captures_consecutives' i la versió limitada a -3..3)
+        - 'anys': taula d'evolució per any (vegeu resum_per_any)
+        - 'ratxes': caçadors per any, modalitat i ratxa limitada
+        - 'equitat': indicadors d'equitat (vegeu modules.equitat)
+    """
+    columnes = [c for c in ('ID', 'any', 'Modalitat', 'Colla_ID', 'adjudicats') if c in data.columns]
+    data = compactar_historial(data[columnes]).sort_values(by=['ID', 'any'])
+    data['captures_consecutives'] = calcular_captures_consecutives(data)
     data['captures_consecutives_clamped'] = data['captures_consecutives'].clip(lower=-3, upper=3)
 
-    # Create heatmap pivots without filling NaN
-    pivot_A = data[data['Modalitat'] == 'A'].pivot(
-        index='ID',
-        columns='any',
-        values='captures_consecutives_clamped'
-    )
-    pivot_B = data[data['Modalitat'] == 'B'].pivot(
-        index='ID',
-        columns='any',
-        values='captures_consecutives_clamped'
-    )
-
-    # Insert empty separator rows
-    empty_rows = pd.DataFrame(np.nan, index=["", "", ""], columns=pivot_A.columns)
-    pivot_heatmap = pd.concat([pivot_A, empty_rows, pivot_B])
-
-    # Colors mapping
-    valors_fixos = [-3, -2, -1, 0, 1, 2, 3]
-    valor_to_color = {
-        -3: "#8B0000",  # Dark red
-        -2: "#FF6347",  # Light red
-        -1: "#FFA500",  # Orange
-         0: "#FFD700",  # Gold
-         1: "#87CEFA",  # Light blue
-         2: "#0000CD",  # Dark blue
-         3: "#4B0082",  # Indigo
-    }
+    ratxes = (data.groupby(['any', 'Modalitat', 'captures_consecutives_clamped'], observed=True)
+                  .size()
+                  .rename('caçadors')
+                  .reset_index())
+    return {'dades': data, 'anys': resum_per_any(data), 'ratxes': ratxes,
+            'equitat': metriques_equitat(data)}
+
+
+def ordenar_per_trajectoria(pivot: pd.DataFrame, n_files: int) -> np.ndarray:
+    """
+    Ordena els IDs d'un pivot (ID x any) per la seva trajectòria i en retorna
+    `n_files` files equiespaiades. Com que les trajectòries iguals queden
+    juntes, cada patró ocupa una franja d'alçada proporcional als IDs que el
+    segueixen.
+    """
+    valors = pivot.to_numpy(dtype=float)
+    n_files = min(n_files, len(valors))
+    if n_files == 0:
+        return np.empty((0, valors.shape[1]))
+    claus = np.where(np.isnan(valors), 9, valors)
+    ordre = np.lexsort(claus.T[::-1])
+    posicions = ((np.arange(n_files) + 0.5) * len(valors) / n_files).astype(int)
+    return valors[ordre][posicions]
+
+
+def dibuixar_heatmap_agregat(ax, pivot_A, pivot_B, cmap, norm, max_files=1000):
+    """
+    Dibuixa el heatmap A/B com una sola imatge ràster (imshow), sense un
+    rectangle per cel·la. Els IDs s'ordenen per trajectòria i es redueixen a
+    `max_files` files en total, de manera que el temps de dibuix no depèn de
+    la mida de la població.
+    """
+    anys = sorted(set(pivot_A.columns).union(pivot_B.columns))
+    pivot_A = pivot_A.reindex(columns=anys)
+    pivot_B = pivot_B.reindex(columns=anys)
+
+    total = len(pivot_A) + len(pivot_B)
+    files = min(total, max_files)
+    files_A = round(files * len(pivot_A) / total) if total else 0
+    if len(pivot_A) and files_A == 0:
+        files_A = 1
+    files_B = files - files_A
+    if len(pivot_B) and files_B == 0:
+        files_B = 1
+    separacio = max(3, files // 100)
+
+    matriu = np.vstack([
+        ordenar_per_trajectoria(pivot_A, files_A),
+        np.full((separacio, len(anys)), np.nan),
+        ordenar_per_trajectoria(pivot_B, files_B)
+    ])
+    n_files = len(matriu)
+
+    cmap_buits = cmap.copy()
+    cmap_buits.set_bad('white')
+    ax.imshow(np.ma.masked_invalid(matriu), cmap=cmap_buits, norm=norm,
+              aspect='auto', interpolation='nearest',
+              extent=(0, len(anys), n_files, 0))
+
+    # Separació i etiquetes de cada modalitat
+    ax.hlines(y=files_A + separacio / 2, xmin=0, xmax=len(anys), colors='black', linewidth=8)
+    ax.text(-0.2, files_A / 2, f'Modalitat A\n({len(pivot_A)} IDs)',
+            va='center', ha='center', rotation=90, fontsize=18, fontweight='bold')
+    ax.text(-0.2, files_A + separacio + files_B / 2, f'Modalitat B\n({len(pivot_B)} IDs)',
+            va='center', ha='center', rotation=90, fontsize=18, fontweight='bold')
+
+    ax.set_xlim(-0.4, len(anys))
+    ax.set_xticks(np.arange(len(anys)) + 0.5)
+    ax.set_xticklabels(anys)
+    ax.set_yticks([])
+    return ax
+
+
+# Colors de cada valor de captures consecutives (limitades a -3..3)
+valors_fixos = [-3, -2, -1, 0, 1, 2, 3]
+valor_to_color = {
+    -3: "#8B0000",  # Dark red
+    -2: "#FF6347",  # Light red
+    -1: "#FFA500",  # Orange
+     0: "#FFD700",  # Gold
+     1: "#87CEFA",  # Light blue
+     2: "#0000CD",  # Dark blue
+     3: "#4B0082",  # Indigo
+}
+
+# Perfils de sortida de les figures: 'preview' per iterar ràpid, 'final' per als informes
+PERFILS_FIGURES = {
+    'preview': {'dpi': 72, 'format': 'png'},
+    'final': {'dpi': 300, 'format': 'png'},
+}
+
+# Nom (sense extensió) de cada figura, tal com les enllaça l'informe
+FIGURES = {
+    'heatmap': 'heatmap_captures_consecutives_final',
+    'barres_modalitat': 'stacked_grouped_bar_percentatges_separat',
+    'barres_petites_grans': 'stacked_grouped_bar_petites_vs_grans',
+}
+
+
+def dibuixar_heatmap(pivot_A, pivot_B, mode_heatmap, path, dpi=300):
+    """Heatmap de captures consecutives per ID i any, separat per modalitat."""
     cmap = ListedColormap([valor_to_color[v] for v in valors_fixos])
     norm = BoundaryNorm(boundaries=[-3.5, -2.5, -1.5, -0.5, 0.5, 1.5, 2.5, 3.5], ncolors=7)
 
-    # HEATMAP
-    plt.figure(figsize=(22, 16))
-    ax = sns.heatmap(
-        pivot_heatmap,
-        cmap=cmap,
-        norm=norm,
-        linewidths=0.5,
-        linecolor='gray',
-        cbar=False
-    )
-
-    # Draw separation line
-    separacio_index = len(pivot_A) + 1.5
-    plt.hlines(y=separacio_index, xmin=0, xmax=pivot_heatmap.shape[1], colors='black', linewidth=8)
+    n_ids = len(pivot_A) + len(pivot_B)
+    if mode_heatmap == 'auto':
+        mode_heatmap = 'detallat' if n_ids <= MAX_IDS_HEATMAP_DETALLAT else 'agregat'
 
-    # Labels for A/B sections
-    plt.text(-0.2, (len(pivot_A)-1)/2, 'Modalitat A', va='center', ha='center', rotation=90, fontsize=18, fontweight='bold')
-    plt.text(-0.2, len(pivot_A)+2+(len(pivot_B)-1)/2, 'Modalitat B', va='center', ha='center', rotation=90, fontsize=18, fontweight='bold')
+    plt.figure(figsize=(22, 16))
+    if mode_heatmap == 'detallat':
+        # Insert empty separator rows
+        empty_rows = pd.DataFrame(np.nan, index=["", "", ""], columns=pivot_A.columns)
+        pivot_heatmap = pd.concat([pivot_A, empty_rows, pivot_B])
+        ax = sns.heatmap(
+            pivot_heatmap,
+            cmap=cmap,
+            norm=norm,
+            linewidths=0.5,
+            linecolor='gray',
+            cbar=False
+        )
+
+        # Draw separation line
+        separacio_index = len(pivot_A) + 1.5
+        plt.hlines(y=separacio_index, xmin=0, xmax=pivot_heatmap.shape[1], colors='black', linewidth=8)
+
+        # Labels for A/B sections
+        plt.text(-0.2, (len(pivot_A)-1)/2, 'Modalitat A', va='center', ha='center', rotation=90, fontsize=18, fontweight='bold')
+        plt.text(-0.2, len(pivot_A)+2+(len(pivot_B)-1)/2, 'Modalitat B', va='center', ha='center', rotation=90, fontsize=18, fontweight='bold')
+        plt.ylabel('ID', fontsize=20, fontweight='bold')
+    elif mode_heatmap == 'agregat':
+        dibuixar_heatmap_agregat(plt.gca(), pivot_A, pivot_B, cmap, norm)
+        plt.ylabel('Caçadors (ordenats per trajectòria)', fontsize=20, fontweight='bold')
+    else:
+        raise ValueError(f"Mode de heatmap desconegut: {mode_heatmap}")
 
     plt.suptitle('Adjudicacions Consecutives per ID\nSeparat per Modalitat A i B', fontsize=26, fontweight='bold', y=.95)
     plt.xlabel('Any', fontsize=20, fontweight='bold')
-    plt.ylabel('ID', fontsize=20, fontweight='bold')
     plt.xticks(fontsize=14)
     plt.yticks(fontsize=12)
     plt.tight_layout(rect=[0, 0, 0.9, 0.95])
@@ -93,21 +222,12 @@ def generar_heatmaps_i_grafics(file_path='data/historial_6_anys.csv', output_fol
     cb.ax.set_yticklabels(valors_fixos, fontsize=18)
     cb.set_label('Adjudicacions Consecutives', fontsize=18, fontweight='bold')
 
-    plt.savefig(os.path.join(output_folder, "heatmap_captures_consecutives_final.png"), dpi=300)
+    plt.savefig(path, dpi=dpi)
     plt.close()
 
-    # STACKED BARS
-    data_A = data[data['Modalitat'] == 'A']
-    data_B = data[data['Modalitat'] == 'B']
-
-    def crear_taules_modalitat(data_modalitat):
-        counts_table = data_modalitat.groupby(['any', 'captures_consecutives_clamped']).size().unstack(fill_value=0)
-        percent_table = counts_table.div(counts_table.sum(axis=1), axis=0) * 100
-        return counts_table, percent_table
-
-    counts_A, percent_A = crear_taules_modalitat(data_A)
-    counts_B, percent_B = crear_taules_modalitat(data_B)
 
+def dibuixar_barres_modalitat(counts_A, percent_A, counts_B, percent_B, path, dpi=300):
+    """Barres apilades del percentatge de cada ratxa per any, A vs B."""
     anys = sorted(list(set(percent_A.index).union(set(percent_B.index))))
     x = np.arange(len(anys))
     bar_width = 0.35
@@ -161,20 +281,18 @@ def generar_heatmaps_i_grafics(file_path='data/historial_6_anys.csv', output_fol
     plt.grid(axis='y', linestyle='--', alpha=0.7)
     plt.tight_layout()
 
-    plt.savefig(os.path.join(output_folder, "stacked_grouped_bar_percentatges_separat.png"), dpi=300)
+    plt.savefig(path, dpi=dpi)
     plt.close()
 
-        # ————————————————————————————————————————————————————————————————
-    # Nou gràfic: Modalitat A, col·les petites vs col·les grans (>10),
-    #     identificades CADA ANY segons la seva mida AQUELL ANY
-    # ————————————————————————————————————————————————————————————————
+
+def taules_petites_grans(data: pd.DataFrame):
+    """
+    Comptatges i percentatges de ratxes de la modalitat A per any, separant
+    les colles de mida mínima d'aquell any de les grans (més de 10 caçadors).
+    """
     data_A = data[data['Modalitat'] == 'A']
     anys = sorted(data_A['any'].unique())
 
-    # valors de captures consecutives i colors ja definits abans:
-    # valors_fixos = [-3, -2, -1, 0, 1, 2, 3]
-    # valor_to_color = { … }
-
     # 1) crear taules buides per a counts i pct
     counts_small = pd.DataFrame(0, index=anys, columns=valors_fixos)
     counts_large = pd.DataFrame(0, index=anys, columns=valors_fixos)
@@ -185,7 +303,7 @@ def generar_heatmaps_i_grafics(file_path='data/historial_6_anys.csv', output_fol
     for anyo in anys:
         df_y = data_A[data_A['any'] == anyo]
         # mida de cada colla aquell any
-        sizes = df_y.groupby('Colla_ID')['ID'].nunique()
+        sizes = df_y.groupby('Colla_ID', observed=True)['ID'].nunique()
         if sizes.empty:
             continue
         min_sz = sizes.min()
@@ -208,7 +326,11 @@ def generar_heatmaps_i_grafics(file_path='data/historial_6_anys.csv', output_fol
             pct_small.at[anyo, v]    = (c_s / total_s * 100) if total_s > 0 else 0
             pct_large.at[anyo, v]    = (c_l / total_l * 100) if total_l > 0 else 0
 
-    # 3) dibuixar el gràfic apilat
+    return anys, counts_small, counts_large, pct_small, pct_large
+
+
+def dibuixar_barres_petites_grans(anys, counts_small, counts_large, pct_small, pct_large, path, dpi=300):
+    """Barres apilades de ratxes de la modalitat A: colles petites vs grans."""
     x = np.arange(len(anys))
     bar_width = 0.35
     separacio = 0.15
@@ -274,7 +396,92 @@ def generar_heatmaps_i_grafics(file_path='data/historial_6_anys.csv', output_fol
     ax.set_ylim(-10, 110)
     plt.grid(axis='y', linestyle='--', alpha=0.7)
     plt.tight_layout()
-    plt.savefig(os.path.join(output_folder,
-                             "stacked_grouped_bar_petites_vs_grans.png"),
-                dpi=300)
+    plt.savefig(path, dpi=dpi)
     plt.close()
+
+
+def _inicialitzar_worker_figures():
+    # Processos sense pantalla: backend Agg abans de dibuixar res
+    plt.switch_backend('Agg')
+
+
+def generar_heatmaps_i_grafics(
+    file_path='data/historial_6_anys.csv',
+    output_folder='figures',
+    mode_heatmap='auto',
+    resum: dict = None,
+    perfil_figures: str = 'final',
+    dpi: int = None,
+    format: str = None,
+    jobs: int = 1
+):
+    """
+    Genera el heatmap de captures consecutives i els gràfics de barres apilades.
+
+    `mode_heatmap` pot ser 'detallat' (una cel·la per ID i any, amb seaborn),
+    'agregat' (imatge ràster amb els IDs ordenats per trajectòria, de cost
+    constant) o 'auto', que tria 'agregat' a partir de MAX_IDS_HEATMAP_DETALLAT IDs.
+    `file_path` pot ser un CSV o una partició del magatzem Parquet d'historials;
+    si es dona `resum` (de resumir_historial) no es llegeix cap fitxer.
+
+    Les taules de cada figura es calculen aquí i cada figura és una tasca
+    independent: amb `jobs` > 1 es dibuixen en paral·lel en processos amb el
+    backend Agg. `perfil_figures` ('preview' o 'final', vegeu PERFILS_FIGURES)
+    fixa la resolució i el format, que `dpi` i `format` poden sobreescriure.
+    Retorna les rutes de les figures generades.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    if resum is None:
+        resum = resumir_historial(
+            llegir_historial(file_path, columnes=['ID', 'any', 'Modalitat', 'Colla_ID', 'adjudicats'])
+        )
+    data = resum['dades']
+    perfil = PERFILS_FIGURES[perfil_figures]
+    dpi = dpi or perfil['dpi']
+    format = format or perfil['format']
+    paths = {nom: os.path.join(output_folder, f"{fitxer}.{format}") for nom, fitxer in FIGURES.items()}
+
+    # Heatmap: pivots sense omplir els NaN
+    pivot_A = data[data['Modalitat'] == 'A'].pivot(
+        index='ID',
+        columns='any',
+        values='captures_consecutives_clamped'
+    )
+    pivot_B = data[data['Modalitat'] == 'B'].pivot(
+        index='ID',
+        columns='any',
+        values='captures_consecutives_clamped'
+    )
+
+    # Barres A vs B: a partir dels comptatges de ratxes del resum
+    ratxes = resum['ratxes']
+
+    def crear_taules_modalitat(modalitat):
+        counts_table = (ratxes[ratxes['Modalitat'] == modalitat]
+                        .set_index(['any', 'captures_consecutives_clamped'])['caçadors']
+                        .unstack(fill_value=0))
+        percent_table = counts_table.div(counts_table.sum(axis=1), axis=0) * 100
+        return counts_table, percent_table
+
+    counts_A, percent_A = crear_taules_modalitat('A')
+    counts_B, percent_B = crear_taules_modalitat('B')
+
+    tasques = [
+        (dibuixar_heatmap, (pivot_A, pivot_B, mode_heatmap, paths['heatmap'], dpi)),
+        (dibuixar_barres_modalitat, (counts_A, percent_A, counts_B, percent_B,
+                                     paths['barres_modalitat'], dpi)),
+        (dibuixar_barres_petites_grans, (*taules_petites_grans(data),
+                                         paths['barres_petites_grans'], dpi)),
+    ]
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasques)),
+                                 initializer=_inicialitzar_worker_figures) as executor:
+            futurs = [executor.submit(funcio, *args) for funcio, args in tasques]
+            for futur in futurs:
+                futur.result()
+    else:
+        for funcio, args in tasques:
+            funcio(*args)
+
+    return list(paths.values())
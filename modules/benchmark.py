@@ -0,0 +1,189 @@
+# modules/benchmark.py
+
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.carrega import llegir_inscrits
+from modules.generador import generar_dades_inicials
+from modules.sorteig import assignar_isards_sorteig_csv
+from modules.simulacio import simular_6_anys_variable
+from modules.historial import desar_historial
+from modules.analisi import generar_heatmaps_i_grafics
+from modules.report import generar_report_escenari
+
+# Mides de població (caçadors totals) i ratis caçadors/captura per defecte
+MIDES = (1_000, 36_000, 360_000)
+RATIS = (5, 10, 20)
+FASES = ('sorteig', 'simulacio', 'figures', 'report')
+
+# Increment relatiu a partir del qual una fase es considera una regressió
+TOLERANCIA = 0.25
+
+
+def clau_cas(mida: int, rati: int, fase: str) -> str:
+    """Clau estable d'un cas dins del fitxer de referència."""
+    return f"n={mida}/rati={rati}/{fase}"
+
+
+def _cronometrar(funcio, repeticions: int) -> float:
+    """Millor temps (en segons) de `repeticions` execucions, sense sortida per pantalla."""
+    temps = []
+    for _ in range(repeticions):
+        with contextlib.redirect_stdout(io.StringIO()):
+            inici = time.perf_counter()
+            funcio()
+            temps.append(time.perf_counter() - inici)
+    return min(temps)
+
+
+def generar_poblacio(mida: int, carpeta: str, seed: int = 0) -> str:
+    """
+    Genera amb `generar_dades_inicials` una població de `mida` caçadors
+    (meitat en colles, meitat individuals) i en retorna la ruta del CSV.
+    """
+    path = os.path.join(carpeta, f"sorteig_{mida}.csv")
+    with contextlib.redirect_stdout(io.StringIO()):
+        generar_dades_inicials(
+            total_cacadors_colla=mida // 2,
+            total_individuals=mida - mida // 2,
+            output_path=path,
+            seed=seed,
+            retornar_df=False
+        )
+    return path
+
+
+def executar_benchmark(
+    mides=MIDES,
+    ratis=RATIS,
+    fases=FASES,
+    repeticions: int = 1,
+    seed: int = 0
+) -> dict:
+    """
+    Mesura el temps de cada fase del pipeline per a cada mida de població i
+    rati caçadors/captura:
+
+        - sorteig: `assignar_isards_sorteig_csv` (lectura del CSV inclosa)
+        - simulacio: `simular_6_anys_variable` amb les captures constants
+        - figures: `generar_heatmaps_i_grafics` sobre l'historial simulat
+        - report: `generar_report_escenari` sobre el mateix historial
+
+    Tot s'escriu en una carpeta temporal. Retorna un dict amb 'meta' (màquina
+    i paràmetres) i 'resultats' ({clau_cas: segons}).
+    """
+    resultats = {}
+    with tempfile.TemporaryDirectory() as carpeta:
+        for mida in mides:
+            csv = generar_poblacio(mida, carpeta, seed)
+            poblacio = llegir_inscrits(csv)
+
+            for rati in ratis:
+                captures = max(1, mida // rati)
+                cas = os.path.join(carpeta, f"n{mida}_r{rati}")
+                print(f"⏱️ {mida} caçadors, {captures} captures/any...")
+
+                if 'sorteig' in fases:
+                    resultats[clau_cas(mida, rati, 'sorteig')] = _cronometrar(
+                        lambda: assignar_isards_sorteig_csv(csv, captures, output_csv=None, seed=seed),
+                        repeticions
+                    )
+
+                if not {'simulacio', 'figures', 'report'} & set(fases):
+                    continue
+
+                historial = {}
+
+                def simular():
+                    historial['df'] = simular_6_anys_variable(
+                        poblacio, [captures] * 6, seed=seed, output_csv=None
+                    )
+
+                temps = _cronometrar(simular, repeticions)
+                if 'simulacio' in fases:
+                    resultats[clau_cas(mida, rati, 'simulacio')] = temps
+                hist_path = desar_historial(historial['df'], os.path.join(cas, 'historial'), 'benchmark', seed)
+
+                if 'figures' in fases:
+                    resultats[clau_cas(mida, rati, 'figures')] = _cronometrar(
+                        lambda: generar_heatmaps_i_grafics(hist_path, os.path.join(cas, 'figures')),
+                        repeticions
+                    )
+
+                if 'report' in fases:
+                    resultats[clau_cas(mida, rati, 'report')] = _cronometrar(
+                        lambda: generar_report_escenari(
+                            nom_escenari='benchmark',
+                            captures_per_any=captures,
+                            min_colla_size=8,
+                            new_hunters_per_year=0,
+                            retired_hunters_per_year=0,
+                            output_dir=os.path.join(cas, 'reports'),
+                            hist_path=hist_path
+                        ),
+                        repeticions
+                    )
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'maquina': platform.platform(),
+            'processador': platform.processor() or platform.machine(),
+            'repeticions': repeticions,
+            'seed': seed,
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'resultats': resultats
+    }
+
+
+def desar_baseline(benchmark: dict, path: str) -> str:
+    """Desa el resultat de `executar_benchmark` com a JSON de referència."""
+    carpeta = os.path.dirname(path)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(benchmark, f, indent=2, sort_keys=True)
+    return path
+
+
+def carregar_baseline(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def comparar_amb_baseline(
+    benchmark: dict,
+    baseline: dict,
+    tolerancia: float = TOLERANCIA
+) -> pd.DataFrame:
+    """
+    Compara els temps actuals amb la referència cas per cas.
+
+    Retorna un DataFrame amb les columnes cas, baseline, actual, variacio
+    (relativa) i regressio (True si el temps creix més que `tolerancia`).
+    Els casos que no són a la referència es mostren amb baseline buit.
+    """
+    referencia = baseline.get('resultats', {})
+    files = []
+    for cas, actual in benchmark['resultats'].items():
+        abans = referencia.get(cas)
+        variacio = (actual - abans) / abans if abans else np.nan
+        files.append({
+            'cas': cas,
+            'baseline': abans,
+            'actual': actual,
+            'variacio': variacio,
+            'regressio': bool(abans) and variacio > tolerancia
+        })
+    return pd.DataFrame(files, columns=['cas', 'baseline', 'actual', 'variacio', 'regressio'])
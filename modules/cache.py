@@ -0,0 +1,130 @@
+# modules/cache.py
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+# Mida màxima per defecte de la memòria cau d'escenaris
+MIDA_MAXIMA_CACHE = 2 * 1024**3
+
+
+# Mòduls que no formen part de la versió del codi: la definició de cada
+# escenari ja va a la seva clau, i afegir-ne o editar-ne un no ha d'invalidar
+# la resta
+EXCLOSOS_VERSIO = ('config_escenaris.py',)
+
+
+def versio_codi(fitxers_extra=()) -> str:
+    """
+    Hash del codi font de modules/*.py (excepte EXCLOSOS_VERSIO) i dels
+    `fitxers_extra`: qualsevol canvi al codi invalida les entrades desades
+    amb una versió anterior.
+    """
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    fitxers = [f for f in sorted(glob.glob(os.path.join(carpeta, '*.py')))
+               if os.path.basename(f) not in EXCLOSOS_VERSIO] + list(fitxers_extra)
+    h = hashlib.sha256()
+    for path in fitxers:
+        h.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def clau_cache(**parts) -> str:
+    """Clau de contingut: hash del JSON canònic de les parts (escenari, llavor, versió...)."""
+    text = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _copiar(origen: str, desti: str):
+    if os.path.isdir(origen):
+        if os.path.isdir(desti):
+            shutil.rmtree(desti)
+        shutil.copytree(origen, desti)
+    else:
+        os.makedirs(os.path.dirname(desti) or '.', exist_ok=True)
+        shutil.copy2(origen, desti)
+
+
+def recuperar(arrel: str, clau: str, destins: dict) -> bool:
+    """
+    Si hi ha una entrada per a `clau`, en copia cada element al seu destí
+    ({nom: ruta de fitxer o carpeta}) i la marca com a usada ara mateix.
+    Retorna False si no hi és o si està incompleta.
+    """
+    entrada = os.path.join(arrel, clau)
+    if not os.path.isfile(os.path.join(entrada, 'meta.json')):
+        return False
+    if not all(os.path.exists(os.path.join(entrada, nom)) for nom in destins):
+        return False
+
+    for nom, desti in destins.items():
+        _copiar(os.path.join(entrada, nom), desti)
+    os.utime(entrada)  # l'ordre d'expulsió és per últim ús
+    return True
+
+
+def desar(arrel: str, clau: str, fonts: dict, meta: dict = None) -> str:
+    """
+    Desa una entrada amb una còpia de cada font ({nom: ruta}). Primer s'omple
+    una carpeta temporal i després es renomena, de manera que una entrada
+    mai queda a mitges encara que diversos processos escriguin alhora. Si
+    l'entrada ja existeix, es deixa tal com és.
+    """
+    entrada = os.path.join(arrel, clau)
+    temporal = f"{entrada}.tmp-{os.getpid()}"
+    if os.path.isdir(temporal):
+        shutil.rmtree(temporal)
+    os.makedirs(temporal)
+
+    for nom, origen in fonts.items():
+        _copiar(origen, os.path.join(temporal, nom))
+    with open(os.path.join(temporal, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(dict(meta or {}, clau=clau, creat=time.strftime('%Y-%m-%dT%H:%M:%S')),
+                  f, indent=2, ensure_ascii=False, default=str)
+
+    # La clau és de contingut: si un altre procés ja ha desat l'entrada, és
+    # equivalent i la nostra còpia sobra
+    if os.path.isdir(entrada):
+        shutil.rmtree(temporal, ignore_errors=True)
+        return entrada
+    try:
+        os.replace(temporal, entrada)
+    except OSError:
+        # Un altre procés l'ha desada entre la comprovació i el renom
+        shutil.rmtree(temporal, ignore_errors=True)
+        if not os.path.isdir(entrada):
+            raise
+    return entrada
+
+
+def _mida_carpeta(carpeta: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f))
+               for d, _, fitxers in os.walk(carpeta) for f in fitxers)
+
+
+def netejar(arrel: str, mida_maxima: int = MIDA_MAXIMA_CACHE) -> list:
+    """
+    Elimina les entrades usades fa més temps fins que la memòria cau ocupa
+    com a molt `mida_maxima` bytes. Retorna les claus eliminades.
+    """
+    if not os.path.isdir(arrel):
+        return []
+    entrades = [os.path.join(arrel, e) for e in os.listdir(arrel)
+                if os.path.isdir(os.path.join(arrel, e)) and '.tmp-' not in e]
+    entrades.sort(key=os.path.getmtime)  # la menys usada primer
+    mides = {e: _mida_carpeta(e) for e in entrades}
+    total = sum(mides.values())
+
+    eliminades = []
+    for entrada in entrades:
+        if total <= mida_maxima:
+            break
+        shutil.rmtree(entrada, ignore_errors=True)
+        total -= mides[entrada]
+        eliminades.append(os.path.basename(entrada))
+    return eliminades
@@ -0,0 +1,115 @@
+# modules/carrega.py
+
+import importlib.util
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+# Motor de lectura: pyarrow (multifil) si està instal·lat, si no el parser C de pandas
+MOTOR_CSV = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c'
+
+# Esquema dels fitxers d'inscrits (sorteig.csv)
+ESQUEMA_INSCRITS = {
+    'ID': 'int64',
+    'Modalitat': pd.CategoricalDtype(['A', 'B']),
+    'Prioritat': 'int64',
+    'Colla_ID': 'category',
+    'anys_sense_captura': 'int64',
+}
+COLUMNES_INSCRITS = ('ID', 'Modalitat', 'Prioritat', 'Colla_ID', 'anys_sense_captura')
+
+# Esquema de l'app de sorteig (les columnes absents s'ignoren). Els comptadors
+# numèrics poden venir buits en els fitxers reals i es deixen inferir.
+ESQUEMA_SOL_LICITANTS = {
+    'Modalitat': 'category',
+    'Colla_ID': 'category',
+}
+
+VERSIO_SNAPSHOT = 1
+
+
+def ruta_snapshot(path: str) -> str:
+    """Fitxer binari desat al costat del CSV: <fitxer>.csv.snapshot.pkl"""
+    return path + '.snapshot.pkl'
+
+
+def validar_inscrits(df: pd.DataFrame) -> None:
+    """
+    Comprova un sol cop, en carregar, que el fitxer d'inscrits és coherent:
+    hi ha totes les columnes, Modalitat només és A o B (una categoria buida
+    vol dir un valor desconegut) i tots els caçadors de colla tenen Colla_ID.
+    """
+    falten = set(COLUMNES_INSCRITS) - set(df.columns)
+    if falten:
+        raise ValueError(f"Falten columnes obligatòries: {falten}")
+    if df['Modalitat'].isna().any():
+        raise ValueError("Modalitat ha de ser 'A' (colla) o 'B' (individual)")
+    if df.loc[df['Modalitat'] == 'A', 'Colla_ID'].isna().any():
+        raise ValueError("Hi ha caçadors de modalitat A sense Colla_ID")
+
+
+def llegir_csv(
+    font,
+    esquema: dict = None,
+    validar=None,
+    snapshot: bool = False,
+    sep: str = ';'
+) -> pd.DataFrame:
+    """
+    Llegeix un CSV amb tipus explícits (`esquema`, les columnes absents
+    s'ignoren) i el motor MOTOR_CSV. `font` pot ser una ruta o un buffer.
+
+    `validar` és una funció que rep el DataFrame i llança ValueError si no és
+    vàlid. Amb snapshot=True i una ruta, el resultat validat es desa al costat
+    del CSV (ruta_snapshot) i les lectures següents el recuperen directament,
+    sense tornar a analitzar el text, mentre el CSV no canviï de mida ni de
+    data de modificació.
+    """
+    clau = None
+    if snapshot and isinstance(font, (str, os.PathLike)):
+        info = os.stat(font)
+        clau = (VERSIO_SNAPSHOT, info.st_size, info.st_mtime_ns, sep, repr(esquema))
+        try:
+            with open(ruta_snapshot(font), 'rb') as f:
+                desat = pickle.load(f)
+            if desat['clau'] == clau:
+                return desat['df']
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+            pass
+
+    # Els tipus s'apliquen després de llegir: amb el motor pyarrow, passar un
+    # `dtype` a read_csv fa convertir també els enters amb cel·les buides de
+    # columnes fora de l'esquema (i falla amb "cannot convert NA to integer").
+    df = pd.read_csv(font, sep=sep, engine=MOTOR_CSV)
+    if esquema:
+        df = df.astype({c: t for c, t in esquema.items() if c in df.columns})
+    if validar is not None:
+        validar(df)
+
+    if clau is not None:
+        path = ruta_snapshot(font)
+        temporal = None
+        try:
+            # Un fitxer temporal propi per a cada escriptura: diversos processos
+            # poden desar alhora el snapshot del mateix CSV sense trepitjar-se
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.',
+                                             prefix=os.path.basename(path) + '.',
+                                             suffix='.tmp', delete=False) as f:
+                temporal = f.name
+                pickle.dump({'clau': clau, 'df': df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, path)
+        except OSError:
+            # carpeta de només lectura: simplement no hi ha snapshot
+            if temporal is not None and os.path.exists(temporal):
+                os.remove(temporal)
+    return df
+
+
+def llegir_inscrits(font, snapshot: bool = False) -> pd.DataFrame:
+    """
+    Llegeix un fitxer d'inscrits (ID;Modalitat;Prioritat;Colla_ID;anys_sense_captura)
+    amb enters, Modalitat i Colla_ID categòriques, i el valida.
+    """
+    return llegir_csv(font, ESQUEMA_INSCRITS, validar_inscrits, snapshot)
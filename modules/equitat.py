@@ -0,0 +1,172 @@
+# modules/equitat.py
+
+import numpy as np
+import pandas as pd
+
+# Com a la secció de colles petites vs grans de l'informe (analisi.taules_petites_grans):
+# petites = colles de la mida mínima d'aquell any, grans = més d'aquesta mida
+MIDA_COLLA_GRAN = 10
+
+# Columnes que identifiquen una rèplica quan l'historial en conté diverses
+CLAUS_REPLICA = ('escenari', 'seed')
+
+# Classe de cada fila: individual (B) o colla petita, mitjana o gran (A)
+CLASSES = np.array(['B', 'A_petita', 'A_mitjana', 'A_gran'], dtype=object)
+
+
+def _codis(serie: pd.Series) -> np.ndarray:
+    """Codis enters 0..k-1 d'una columna (-1 per als buits), sense ordenar."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(dtype=np.int64)
+    return pd.factorize(serie)[0].astype(np.int64)
+
+
+def _gini_per_grup(grup: np.ndarray, valors: np.ndarray, n_grups: int) -> np.ndarray:
+    """
+    Índex de Gini de `valors` dins de cada grup 0..n_grups-1 amb una sola
+    ordenació: G = 2·Σ i·x_i / (n·Σx) - (n+1)/n amb x ordenats dins del grup.
+    Els grups sense valors o amb suma zero tenen Gini 0.
+    """
+    gini = np.zeros(n_grups)
+    if len(valors) == 0:
+        return gini
+    ordre = np.lexsort((valors, grup))
+    g = grup[ordre]
+    v = valors[ordre].astype(float)
+    inici = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    n = np.diff(np.r_[inici, len(v)])
+    rang = np.arange(len(v)) - np.repeat(inici, n) + 1
+
+    suma = np.add.reduceat(v, inici)
+    ponderada = np.add.reduceat(rang * v, inici)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gini[g[inici]] = np.where(suma > 0, 2 * ponderada / (n * suma) - (n + 1) / n, 0.0)
+    return gini
+
+
+def metriques_caçadors(data: pd.DataFrame, mida_colla_gran: int = MIDA_COLLA_GRAN) -> pd.DataFrame:
+    """
+    Mètriques per caçador sobre un historial (una fila per ID i any, com el de
+    simular_6_anys_variable o simular_6_anys_tracking):
+
+        - anys: anys que hi participa
+        - adjudicats: adjudicacions acumulades
+        - taxa: adjudicacions per any de participació
+        - ratxa_seca_maxima: anys seguits més llarg sense cap adjudicació
+        - Modalitat i classe ('B', 'A_petita', 'A_mitjana' o 'A_gran') del primer any
+
+    La mida de colla es mesura cada any: una colla és petita si té la mida
+    mínima de les colles d'aquell any i gran si té més de `mida_colla_gran`
+    caçadors, com a la secció de colles petites vs grans de l'informe. Si
+    l'historial té columnes 'escenari' o 'seed', cada rèplica es tracta per
+    separat. Tot són reduccions NumPy sobre una sola ordenació, sense bucles
+    per caçador.
+    """
+    claus = [c for c in CLAUS_REPLICA if c in data.columns]
+    n = len(data)
+    anys = data['any'].to_numpy(dtype=np.int64)
+    ids = data['ID'].to_numpy(dtype=np.int64)
+    adjudicats = data['adjudicats'].to_numpy(dtype=np.int64)
+    es_A = (data['Modalitat'] == 'A').to_numpy()
+    replica = (data.groupby(claus, sort=True, observed=True).ngroup().to_numpy(dtype=np.int64)
+               if claus else np.zeros(n, dtype=np.int64))
+
+    # Mida de la colla de cada fila i mida mínima de colla (per rèplica i any)
+    colla = _codis(data['Colla_ID'])
+    if n:
+        any_rel = anys - anys.min()
+        clau_any = replica * (any_rel.max() + 1) + any_rel
+        clau_colla = clau_any * (colla.max() + 2) + colla + 1
+        grup_colla = pd.factorize(clau_colla)[0]
+        mida = np.bincount(grup_colla)[grup_colla]
+        mida_minima = np.full(clau_any.max() + 1, np.iinfo(np.int64).max)
+        np.minimum.at(mida_minima, clau_any[es_A], mida[es_A])
+        es_petita = mida == mida_minima[clau_any]
+    else:
+        mida = np.zeros(0, dtype=np.int64)
+        es_petita = np.zeros(0, dtype=bool)
+    classe = np.select([~es_A, es_petita, mida > mida_colla_gran], [0, 1, 3], default=2)
+
+    # Ordenar per rèplica, caçador i any: cada caçador és un tram contigu
+    ordre = np.lexsort((anys, ids, replica))
+    r, i, a = replica[ordre], ids[ordre], adjudicats[ordre]
+    nou = np.r_[True, (r[1:] != r[:-1]) | (i[1:] != i[:-1])] if n else np.zeros(0, dtype=bool)
+    inici = np.flatnonzero(nou)
+    n_anys = np.diff(np.r_[inici, n])
+    total = np.add.reduceat(a, inici) if n else np.zeros(0, dtype=np.int64)
+
+    # Ratxa seca més llarga: trams de files seguides sense adjudicació
+    sec = a == 0
+    inici_tram = nou | np.r_[True, sec[1:] != sec[:-1]] if n else nou
+    trams = np.flatnonzero(inici_tram)
+    llargada = np.diff(np.r_[trams, n]) * sec[trams]
+    ratxa_seca = (np.maximum.reduceat(llargada, np.flatnonzero(nou[trams]))
+                  if n else np.zeros(0, dtype=np.int64))
+
+    primera = ordre[inici]
+    resultat = {c: data[c].to_numpy()[primera] for c in claus}
+    resultat.update({
+        'ID': i[inici],
+        'Modalitat': np.where(es_A[primera], 'A', 'B'),
+        'classe': CLASSES[classe[primera]],
+        'anys': n_anys,
+        'adjudicats': total,
+        'taxa': total / np.maximum(n_anys, 1),
+        'ratxa_seca_maxima': ratxa_seca,
+    })
+    return pd.DataFrame(resultat)
+
+
+def _estadistiques_grup(caçadors: pd.DataFrame, claus: list, columna: str) -> pd.DataFrame:
+    """Mitjana, variància, Gini i ratxes seques de cada grup de `columna`."""
+    grups = caçadors.groupby(claus + [columna], sort=True, observed=True)
+    taula = grups.agg(
+        caçadors=('adjudicats', 'size'),
+        adjudicats_mitjana=('adjudicats', 'mean'),
+        adjudicats_variancia=('adjudicats', 'var'),
+        taxa_mitjana=('taxa', 'mean'),
+        taxa_variancia=('taxa', 'var'),
+        ratxa_seca_mitjana=('ratxa_seca_maxima', 'mean'),
+        ratxa_seca_maxima=('ratxa_seca_maxima', 'max'),
+    )
+    codi = grups.ngroup().to_numpy(dtype=np.int64)
+    taula['gini'] = _gini_per_grup(codi, caçadors['adjudicats'].to_numpy(), len(taula))
+    return taula.reset_index().rename(columns={columna: 'grup'})
+
+
+def bretxa_modalitats(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Taxa de captura (adjudicacions per caçador) de cada modalitat i any, i la
+    diferència A - B (positiva si les colles surten afavorides).
+    """
+    claus = [c for c in CLAUS_REPLICA if c in data.columns] + ['any']
+    taula = (data.groupby(claus + ['Modalitat'], sort=True, observed=True)['adjudicats']
+                 .agg(['sum', 'size'])
+                 .unstack('Modalitat'))
+    taxa_A = taula[('sum', 'A')] / taula[('size', 'A')] if ('sum', 'A') in taula else np.nan
+    taxa_B = taula[('sum', 'B')] / taula[('size', 'B')] if ('sum', 'B') in taula else np.nan
+    resultat = pd.DataFrame({'taxa_A': taxa_A, 'taxa_B': taxa_B}, index=taula.index)
+    resultat['bretxa'] = resultat['taxa_A'] - resultat['taxa_B']
+    return resultat.reset_index()
+
+
+def metriques_equitat(data: pd.DataFrame, mida_colla_gran: int = MIDA_COLLA_GRAN) -> dict:
+    """
+    Indicadors d'equitat d'un historial (o d'un conjunt de rèpliques):
+
+        - 'caçadors': mètriques per caçador (vegeu metriques_caçadors)
+        - 'grups': per modalitat ('A', 'B') i per classe de colla ('A_petita',
+          'A_mitjana', 'A_gran'), nombre de caçadors, mitjana i variància d'adjudicacions
+          acumulades i de taxa, Gini de les adjudicacions acumulades i ratxes
+          seques
+        - 'bretxa': taxa de captura A i B per any i la diferència A - B
+    """
+    caçadors = metriques_caçadors(data, mida_colla_gran)
+    claus = [c for c in CLAUS_REPLICA if c in caçadors.columns]
+    grups = pd.concat([
+        _estadistiques_grup(caçadors, claus, 'Modalitat'),
+        _estadistiques_grup(caçadors[caçadors['Modalitat'] == 'A'], claus, 'classe'),
+    ], ignore_index=True)
+    if claus:
+        grups = grups.sort_values(claus, kind='stable', ignore_index=True)
+    return {'caçadors': caçadors, 'grups': grups, 'bretxa': bretxa_modalitats(data)}
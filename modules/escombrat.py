@@ -0,0 +1,285 @@
+# modules/escombrat.py
+
+import contextlib
+import io
+import itertools
+import os
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from modules.generador import generar_dades_inicials
+from modules.simulacio import simular_6_anys_variable, simular_arbre_escenaris, entrada_any
+from modules.equitat import metriques_equitat
+
+# Graella d'exemple: cada dimensió és una llista de valors o un dict {etiqueta: valor}
+GRAELLA_PER_DEFECTE = {
+    'colla': {'min8': (8, 20), 'min6': (6, 20)},
+    'captures': {
+        'fixes150': [150] * 6,
+        'variables': [60, 150, 1, 3, 120, 80],
+    },
+    'rotacio': {
+        'sense': ((0, 0), (0, 0)),
+        'aleatoria': ((1, 10), (1, 10)),
+    },
+    'poblacio': {'365': (175, 190)},
+    'seeds': [42],
+}
+
+# Anys comuns a partir dels quals val la pena simular un grup de variants en
+# un sol arbre (un sol procés) en lloc de repartir-les entre processos
+ANYS_COMUNS_MINIMS = 2
+
+# Variants com a molt per tasca, perquè un grup gran no ocupi un sol procés
+MAX_VARIANTS_PER_TASCA = 8
+
+# Columnes de la taula comparativa que identifiquen cada variant
+COLUMNES_VARIANT = ['nom', 'colla', 'captures', 'rotacio', 'poblacio', 'seed']
+
+
+def _opcions(valors) -> dict:
+    """Una dimensió de la graella com a {etiqueta: valor}."""
+    if isinstance(valors, dict):
+        return valors
+    return {str(v): v for v in valors}
+
+
+def _rang_rotacio(valor):
+    """Un rang (min, max) com a tupla, o una llista de rangs (un per any) com a llista de tuples."""
+    if len(valor) and isinstance(valor[0], (list, tuple)):
+        return [tuple(r) for r in valor]
+    return tuple(valor)
+
+
+def expandir_graella(graella: dict = GRAELLA_PER_DEFECTE) -> list:
+    """
+    Expandeix una graella compacta en una llista de variants (producte
+    cartesià de totes les dimensions):
+
+        - 'colla': (min_colla, max_colla)
+        - 'captures': llista de captures per any
+        - 'rotacio': (rang de nous caçadors, rang de retirats); cada rang pot
+          ser una llista amb un rang per any
+        - 'poblacio': (caçadors en colla, individuals) inicials
+        - 'seeds': llavors
+
+    Cada dimensió pot ser una llista de valors o un dict {etiqueta: valor};
+    les etiquetes formen el nom de la variant. Les dimensions que falten
+    prenen els valors de GRAELLA_PER_DEFECTE.
+    """
+    dimensions = {k: _opcions(graella.get(k, GRAELLA_PER_DEFECTE[k]))
+                  for k in ('colla', 'captures', 'rotacio', 'poblacio', 'seeds')}
+
+    variants = []
+    for (e_colla, colla), (e_capt, captures), (e_rot, rotacio), (e_pob, poblacio), (_, seed) in \
+            itertools.product(*(d.items() for d in dimensions.values())):
+        variants.append({
+            'nom': f"colla={e_colla}/captures={e_capt}/rotacio={e_rot}/poblacio={e_pob}/seed={seed}",
+            'colla': e_colla,
+            'captures': e_capt,
+            'rotacio': e_rot,
+            'poblacio': e_pob,
+            'seed': int(seed),
+            'min_colla': colla[0],
+            'max_colla': colla[1],
+            'captures_per_any': list(captures),
+            'new_hunters_per_year': _rang_rotacio(rotacio[0]),
+            'retired_hunters_per_year': _rang_rotacio(rotacio[1]),
+            'total_cacadors_colla': poblacio[0],
+            'total_individuals': poblacio[1],
+        })
+    return variants
+
+
+def _generar_poblacio(variant: dict, carpeta: str) -> pd.DataFrame:
+    return generar_dades_inicials(
+        total_cacadors_colla=variant['total_cacadors_colla'],
+        total_individuals=variant['total_individuals'],
+        min_colla_size=variant['min_colla'],
+        max_colla_size=variant['max_colla'],
+        output_path=os.path.join(carpeta, 'sorteig.csv'),
+        seed=variant['seed']
+    )
+
+
+def _fila_variant(variant: dict, df_hist: pd.DataFrame, segons: float) -> dict:
+    """Fila de la taula comparativa: captures, taxes, bretxa A - B, Gini i ratxes seques per grup."""
+    equitat = metriques_equitat(df_hist)
+    darrer_any = df_hist[df_hist['any'] == df_hist['any'].max()]
+    fila = {c: variant[c] for c in COLUMNES_VARIANT}
+    fila.update({
+        'caçadors_inicials': int((df_hist['any'] == df_hist['any'].min()).sum()),
+        'caçadors_finals': len(darrer_any),
+        'captures_totals': int(df_hist['adjudicats'].sum()),
+        'taxa_A': equitat['bretxa']['taxa_A'].mean(),
+        'taxa_B': equitat['bretxa']['taxa_B'].mean(),
+        'bretxa_A_B': equitat['bretxa']['bretxa'].mean(),
+    })
+    for grup in equitat['grups'].itertuples(index=False):
+        fila[f'gini_{grup.grup}'] = grup.gini
+        fila[f'ratxa_seca_{grup.grup}'] = grup.ratxa_seca_mitjana
+    fila['segons'] = segons
+    fila['error'] = None
+    return fila
+
+
+def executar_variant(variant: dict) -> dict:
+    """
+    Genera la població, simula els anys de la variant i en retorna una fila
+    de la taula comparativa. No escriu res fora d'una carpeta temporal.
+    """
+    inici = time.perf_counter()
+    with tempfile.TemporaryDirectory() as carpeta, contextlib.redirect_stdout(io.StringIO()):
+        df_hist = simular_6_anys_variable(
+            _generar_poblacio(variant, carpeta),
+            captures_per_year_list=variant['captures_per_any'],
+            seed=variant['seed'],
+            min_colla_size=variant['min_colla'],
+            max_colla_size=variant['max_colla'],
+            new_hunters_range=variant['new_hunters_per_year'],
+            retired_hunters_range=variant['retired_hunters_per_year'],
+            output_csv=None
+        )
+    return _fila_variant(variant, df_hist, time.perf_counter() - inici)
+
+
+def _executar_aillat(variant: dict) -> dict:
+    """Com executar_variant, però un error es retorna a la fila en lloc de propagar-se."""
+    try:
+        return executar_variant(variant)
+    except Exception:
+        fila = {c: variant[c] for c in COLUMNES_VARIANT}
+        fila['error'] = traceback.format_exc(limit=3).strip().splitlines()[-1]
+        return fila
+
+
+def clau_poblacio(variant: dict) -> tuple:
+    """Variants amb la mateixa clau parteixen de la mateixa població i llavor."""
+    return (variant['min_colla'], variant['max_colla'], variant['total_cacadors_colla'],
+            variant['total_individuals'], variant['seed'])
+
+
+def _anys_comuns(variants: list) -> int:
+    """Anys inicials amb les mateixes entrades (entrada_any) per a totes les variants."""
+    anys = min(len(v['captures_per_any']) for v in variants)
+    for anyo in range(1, anys + 1):
+        if len({entrada_any(v, anyo) for v in variants}) > 1:
+            return anyo - 1
+    return anys
+
+
+def partir_grup(
+    variants: list,
+    anys_minims: int = ANYS_COMUNS_MINIMS,
+    max_variants: int = MAX_VARIANTS_PER_TASCA
+) -> list:
+    """
+    Parteix un grup de variants amb la mateixa població i llavor en tasques
+    per al ProcessPoolExecutor. Un grup es manté junt (un sol arbre) si les
+    seves variants comparteixen almenys `anys_minims` anys; si no, es
+    bifurca al primer any on divergeixen i cada branca es parteix de nou.
+    Les tasques de més de `max_variants` variants es tallen en trossos.
+    """
+    if len(variants) == 1:
+        return [variants]
+    comuns = _anys_comuns(variants)
+    if comuns >= min(anys_minims, min(len(v['captures_per_any']) for v in variants)):
+        return [variants[i:i + max_variants] for i in range(0, len(variants), max_variants)]
+    branques = {}
+    for variant in variants:
+        branques.setdefault(entrada_any(variant, comuns + 1), []).append(variant)
+    return [tasca for branca in branques.values()
+            for tasca in partir_grup(branca, anys_minims, max_variants)]
+
+
+def executar_grup(variants: list) -> list:
+    """
+    Executa un grup de variants amb la mateixa població inicial i llavor:
+    la població es genera un sol cop i els anys comuns es simulen un sol cop
+    (simular_arbre_escenaris). Si el grup falla, cada variant es torna a
+    executar per separat perquè l'error quedi només a les files afectades.
+    """
+    if len(variants) == 1:
+        return [_executar_aillat(variants[0])]
+    inici = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory() as carpeta, contextlib.redirect_stdout(io.StringIO()):
+            historials = simular_arbre_escenaris(
+                _generar_poblacio(variants[0], carpeta), variants, seed=variants[0]['seed']
+            )
+    except Exception:
+        return [_executar_aillat(v) for v in variants]
+    # El temps del grup es reparteix entre les seves variants
+    segons = (time.perf_counter() - inici) / len(variants)
+    return [_fila_variant(v, historials[v['nom']], segons) for v in variants]
+
+
+def executar_escombrat(
+    variants: list,
+    jobs: int = None,
+    output_csv: str = None,
+    reprendre: bool = False
+) -> pd.DataFrame:
+    """
+    Executa totes les variants en un ProcessPoolExecutor (per defecte tots
+    els nuclis) i en recull una taula comparativa, una fila per variant.
+    Les variants que comparteixen població i llavor (clau_poblacio) i prou
+    anys comuns (partir_grup) van al mateix procés i comparteixen aquests
+    anys; la resta es reparteixen entre processos.
+
+    Una variant que falla (p. ex. una mida de colla impossible) no atura la
+    resta: la seva fila porta el missatge a la columna 'error'. El progrés
+    es mostra a mesura que acaben les variants.
+
+    Amb `output_csv` la taula es desa en acabar; si a més `reprendre` és
+    True, les variants que ja hi són sense error no es tornen a executar.
+    """
+    fetes = []
+    if reprendre and output_csv and os.path.isfile(output_csv):
+        anterior = pd.read_csv(output_csv)
+        fetes = anterior[anterior['error'].isna()].to_dict('records')
+        noms_fets = {f['nom'] for f in fetes}
+        variants = [v for v in variants if v['nom'] not in noms_fets]
+        print(f"♻️ {len(noms_fets)} variants ja calculades a {output_csv}")
+
+    grups = {}
+    for variant in variants:
+        grups.setdefault(clau_poblacio(variant), []).append(variant)
+    tasques = [t for g in grups.values() for t in partir_grup(g)]
+
+    files = []
+    total = len(variants)
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futurs = {executor.submit(executar_grup, t): t for t in tasques}
+        for futur in as_completed(futurs):
+            try:
+                files_grup = futur.result()
+            except Exception as e:  # el procés treballador ha mort
+                files_grup = [dict({c: v[c] for c in COLUMNES_VARIANT}, error=repr(e))
+                              for v in futurs[futur]]
+            for fila in files_grup:
+                files.append(fila)
+                estat = '✅' if fila['error'] is None else f"❌ {fila['error']}"
+                print(f"📊 [{len(files)}/{total}] {fila['nom']} {estat}")
+
+    ordre = {v['nom']: i for i, v in enumerate(variants)}
+    taula = pd.DataFrame(files)
+    if len(taula):
+        taula = taula.sort_values('nom', key=lambda s: s.map(ordre), ignore_index=True)
+    taula = pd.concat([pd.DataFrame(fetes), taula], ignore_index=True) if fetes else taula
+
+    fallides = int(taula['error'].notna().sum()) if len(taula) else 0
+    if output_csv:
+        carpeta = os.path.dirname(output_csv)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        taula.to_csv(output_csv, index=False)
+        print(f"✅ Taula comparativa desada a {output_csv}")
+    if fallides:
+        print(f"⚠️ {fallides} variants fallides de {len(taula)}")
+    return taula
@@ -1,14 +1,34 @@
 import pandas as pd
 import numpy as np
-import random
 import os
 import math
 
-def generate_colla_sizes(total, min_size=8, max_size=20):
-    """Genera una llista de mides de colla que sumen exactament 'total',
-    assegurant que almenys el 30% de les colles són de mida mínima."""
-    
-    sizes = []
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # sense pyarrow s'escriu amb pandas (més lent)
+    pa = None
+
+# Files per bloc en escriure el CSV (limita la memòria en poblacions grans)
+MIDA_BLOC = 1_000_000
+
+
+def _rng(seed):
+    """Accepta una llavor o un np.random.RandomState ja creat."""
+    if isinstance(seed, np.random.RandomState):
+        return seed
+    return np.random.RandomState(seed)
+
+
+def generate_colla_sizes(total, min_size=8, max_size=20, seed=None):
+    """Genera un array de mides de colla que sumen exactament 'total',
+    assegurant que almenys el 30% de les colles són de mida mínima.
+
+    Les mides es treuen per lots: cada lot és una seqüència de mides uniformes
+    entre min_size i max_size, i se n'accepten les que encara caben. Una mida
+    que no cap es torna a sortejar (en el lot següent), que és el mateix que
+    sortejar-la uniforme entre min_size i el que queda."""
+    rng = _rng(seed)
 
     # 1) Primer pas: assegurar 30% de colles amb mida mínima
     estimated_total_collas = math.ceil(total / ((min_size + max_size) / 2))  # estimació més real
@@ -19,32 +39,40 @@ def generate_colla_sizes(total, min_size=8, max_size=20):
         min_collas = total // min_size
         min_total = min_collas * min_size
 
-    sizes.extend([min_size] * min_collas)
+    lots = [np.full(min_collas, min_size, dtype=np.int64)]
     rem = total - min_total
 
     # 2) Segon pas: completar aleatòriament la resta
     while rem >= min_size:
-        max_possible = min(max_size, rem)
-        size = random.randint(min_size, max_possible)
-        sizes.append(size)
-        rem -= size
+        mides = rng.randint(min_size, max_size + 1, size=rem // min_size + 1)
+        n = np.searchsorted(np.cumsum(mides), rem, side='right')
+        lots.append(mides[:n])
+        rem -= int(mides[:n].sum())
+
+    sizes = np.concatenate(lots)
 
     # 3) Tercer pas: si queda rem < min_size, repartir-lo entre colles existents
     if rem > 0:
-        # Ordenem de més petit a més gran perquè no passem max_size
-        sizes.sort(reverse=True)
-        for i in range(len(sizes)):
-            if sizes[i] + 1 <= max_size:
-                sizes[i] += 1
-                rem -= 1
-                if rem == 0:
-                    break
-        if rem > 0:
+        # Ordenem de més gran a més petit i sumem 1 a les primeres que no passen de max_size
+        sizes = np.sort(sizes)[::-1]
+        candidates = np.flatnonzero(sizes + 1 <= max_size)
+        if len(candidates) < rem:
             raise ValueError("No s'ha pogut repartir el remanent sense superar el max_size.")
+        sizes[candidates[:rem]] += 1
 
     return sizes
 
 
+def sortejar_valors(distribucio, n, rng) -> np.ndarray:
+    """
+    Valors d'una columna per a `n` caçadors: un enter fix (tots iguals) o un
+    dict {valor: probabilitat} (les probabilitats es normalitzen).
+    """
+    if isinstance(distribucio, dict):
+        valors = np.fromiter(distribucio.keys(), dtype=np.int64)
+        probs = np.fromiter(distribucio.values(), dtype=float)
+        return rng.choice(valors, size=n, p=probs / probs.sum())
+    return np.full(n, distribucio, dtype=np.int64)
 
 
 def generar_dades_inicials(
@@ -52,48 +80,71 @@ def generar_dades_inicials(
     total_individuals: int,
     min_colla_size: int = 8,
     max_colla_size: int = 20,
-    output_path: str = 'data/sorteig.csv'  # ✨ Nou paràmetre flexible
+    output_path: str = 'data/sorteig.csv',  # ✨ Nou paràmetre flexible
+    seed=None,
+    prioritat=3,
+    anys_sense_captura=0,
+    mida_bloc: int = MIDA_BLOC,
+    retornar_df: bool = True
 ):
-    """Genera un CSV amb estructura de caçadors modalitat A i B."""
-    # Generar colles
-    sizes = generate_colla_sizes(total_cacadors_colla, min_size=min_colla_size, max_size=max_colla_size)
-    data = []
-    pid = 1
-    print(sizes)
-
-    # Assignar participants Modalitat A (colla)
-    for i, size in enumerate(sizes, start=1):
-        for _ in range(size):
-            data.append({
-                'ID': pid,
-                'Modalitat': 'A',
-                'Prioritat': 3,
-                'Colla_ID': f'Colla_{i}',
-                'anys_sense_captura': 0
-            })
-            pid += 1
+    """Genera un CSV amb estructura de caçadors modalitat A i B.
+
+    Les columnes es construeixen com a arrays i el CSV s'escriu per blocs de
+    `mida_bloc` files, de manera que es poden generar poblacions de milions de
+    caçadors amb memòria acotada (retornar_df=False per no tenir-les senceres
+    en memòria; aleshores retorna None).
 
-    # Assignar participants Modalitat B (individual)
-    for _ in range(total_individuals):
-        data.append({
-            'ID': pid,
-            'Modalitat': 'B',
-            'Prioritat': 3,
-            'Colla_ID': np.nan,
-            'anys_sense_captura': 0
-        })
-        pid += 1
+    `seed` és una llavor o un np.random.RandomState. `prioritat` i
+    `anys_sense_captura` poden ser un enter (per defecte 3 i 0) o una
+    distribució {valor: probabilitat}, p. ex. {2: 0.5, 3: 0.3, 4: 0.2}.
+    """
+    rng = _rng(seed)
+
+    # Generar colles
+    sizes = generate_colla_sizes(total_cacadors_colla, min_size=min_colla_size,
+                                 max_size=max_colla_size, seed=rng)
+    n_colla = int(sizes.sum())
+    total = n_colla + total_individuals
 
-    df = pd.DataFrame(data)
+    # Colla_ID com a codis: 0..k-1 per a Colla_1..Colla_k, -1 per als individuals (B)
+    noms_colles = [f'Colla_{i}' for i in range(1, len(sizes) + 1)]
+    inici_colla = np.cumsum(sizes) - sizes
 
     # Assegurar que existeix la carpeta del path
     output_dir = os.path.dirname(output_path)
     if output_dir:  # Només crear si existeix un directori!
         os.makedirs(output_dir, exist_ok=True)
 
-    # Guardar CSV
-    df.to_csv(output_path, index=False, sep=';')
-    print(f"✅ Dades inicials generades i desades a {output_path}")
-
-    return df
-
+    columnes = ['ID', 'Modalitat', 'Prioritat', 'Colla_ID', 'anys_sense_captura']
+    opcions = (pa_csv.WriteOptions(include_header=False, delimiter=';', quoting_style='none')
+               if pa is not None else None)
+    blocs = [pd.DataFrame(columns=columnes)] if retornar_df else []
+
+    with open(output_path, 'wb') as f:
+        f.write((';'.join(columnes) + '\n').encode())
+        for inici in range(0, total, mida_bloc):
+            fila = np.arange(inici, min(inici + mida_bloc, total))
+            es_colla = fila < n_colla
+            codis = np.where(es_colla, np.searchsorted(inici_colla, fila, side='right') - 1, -1)
+
+            bloc = pd.DataFrame({
+                'ID': fila + 1,
+                'Modalitat': pd.Categorical.from_codes(np.where(es_colla, 0, 1), categories=['A', 'B']),
+                'Prioritat': sortejar_valors(prioritat, len(fila), rng),
+                'Colla_ID': pd.Categorical.from_codes(codis, categories=noms_colles),
+                'anys_sense_captura': sortejar_valors(anys_sense_captura, len(fila), rng)
+            })
+            # Guardar el bloc al CSV (pyarrow l'escriu molt més ràpid que pandas)
+            if opcions is not None:
+                pa_csv.write_csv(pa.Table.from_pandas(bloc, preserve_index=False), f, opcions)
+            else:
+                f.write(bloc.to_csv(index=False, sep=';', header=False).encode())
+            if retornar_df:
+                blocs.append(bloc)
+
+    print(f"✅ Dades inicials generades i desades a {output_path} "
+          f"({total} caçadors, {len(sizes)} colles)")
+
+    if retornar_df:
+        return pd.concat(blocs[1:] or blocs, ignore_index=True)
+    return None
@@ -0,0 +1,120 @@
+# modules/historial.py
+
+import os
+
+import pandas as pd
+
+from modules.carrega import MOTOR_CSV
+
+# Tipus compactes de les columnes de l'historial de simulació
+DTYPES_HISTORIAL = {
+    'ID': 'int32',
+    'Modalitat': 'category',
+    'Colla_ID': 'category',
+    'Prioritat': 'int8',
+    'anys_sense_captura': 'int16',
+    'adjudicats': 'int8',
+    'nova_prioritat': 'int8',
+    'nou_anys_sense_captura': 'int16',
+    'any': 'int16',
+}
+
+
+def compactar_historial(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converteix les columnes conegudes de l'historial als tipus de
+    DTYPES_HISTORIAL (flags int8, Modalitat i Colla_ID categòriques...).
+    Les columnes enteres amb valors buits es deixen com estan.
+    """
+    df = df.copy()
+    for col, dtype in DTYPES_HISTORIAL.items():
+        if col not in df.columns:
+            continue
+        if dtype != 'category' and df[col].isna().any():
+            continue
+        df[col] = df[col].astype(dtype)
+    return df
+
+
+def ruta_historial(arrel: str, escenari: str, seed: int) -> str:
+    """Carpeta de la partició escenari/seed dins del magatzem."""
+    return os.path.join(arrel, f"escenari={escenari}", f"seed={seed}")
+
+
+def particions_historial(arrel: str = os.path.join('data', 'historial')) -> list:
+    """Parelles (escenari, seed) desades al magatzem, ordenades."""
+    particions = []
+    if not os.path.isdir(arrel):
+        return particions
+    for carpeta_escenari in sorted(os.listdir(arrel)):
+        if not carpeta_escenari.startswith('escenari='):
+            continue
+        for carpeta_seed in sorted(os.listdir(os.path.join(arrel, carpeta_escenari))):
+            if carpeta_seed.startswith('seed='):
+                particions.append((carpeta_escenari[len('escenari='):], int(carpeta_seed[len('seed='):])))
+    return sorted(particions)
+
+
+def desar_historial(
+    df_hist: pd.DataFrame,
+    arrel: str = os.path.join('data', 'historial'),
+    escenari: str = 'base',
+    seed: int = 0
+) -> str:
+    """
+    Desa l'historial en format Parquet, particionat per escenari/seed/any:
+
+        <arrel>/escenari=<nom>/seed=<seed>/any=<n>/part-0.parquet
+
+    Cada any es reescriu sencer, de manera que tornar a executar un escenari
+    substitueix les seves dades. Retorna la carpeta escenari/seed.
+    """
+    carpeta = ruta_historial(arrel, escenari, seed)
+    df_hist = compactar_historial(df_hist)
+    for anyo, df_any in df_hist.groupby('any', observed=True):
+        carpeta_any = os.path.join(carpeta, f"any={anyo}")
+        os.makedirs(carpeta_any, exist_ok=True)
+        df_any.drop(columns=['any']).to_parquet(
+            os.path.join(carpeta_any, 'part-0.parquet'),
+            index=False,
+            compression='zstd'
+        )
+    return carpeta
+
+
+def llegir_historial(
+    ruta: str,
+    columnes: list = None,
+    escenari: str = None,
+    seed: int = None,
+    anys: list = None
+) -> pd.DataFrame:
+    """
+    Llegeix un historial amb tipus compactes i només les `columnes` demanades.
+
+    `ruta` pot ser un CSV (format antic), l'arrel del magatzem Parquet o una
+    de les seves particions. Els filtres escenari/seed/anys s'apliquen a les
+    particions sense llegir la resta de fitxers.
+    """
+    if os.path.isfile(ruta) and ruta.endswith('.csv'):
+        df = pd.read_csv(ruta, usecols=columnes, engine=MOTOR_CSV)
+        if anys is not None:
+            df = df[df['any'].isin(anys)]
+        return compactar_historial(df)
+
+    # El particionat hive infereix seed= i any= com a enters: els filtres també ho són
+    filtres = []
+    if escenari is not None:
+        filtres.append(('escenari', '==', escenari))
+    if seed is not None:
+        filtres.append(('seed', '==', int(seed)))
+    if anys is not None:
+        filtres.append(('any', 'in', [int(a) for a in anys]))
+
+    df = pd.read_parquet(ruta, columns=columnes, filters=filtres or None)
+
+    # Les claus de partició arriben com a categories de text
+    for col in ('any', 'seed'):
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype('int64')
+    return compactar_historial(df)
@@ -0,0 +1,189 @@
+# modules/montecarlo.py
+
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from modules.analisi import calcular_captures_consecutives
+from modules.carrega import llegir_inscrits
+from modules.equitat import metriques_equitat
+from modules.simulacio import simular_6_anys_variable
+
+# Població inicial compartida per cada procés treballador (s'envia un sol cop)
+_POBLACIO = None
+_PARAMS_SIMULACIO = None
+
+
+def llavors_replicas(n_replicas: int, seed: int = 0) -> list:
+    """
+    Genera `n_replicas` llavors ben separades a partir d'una llavor base.
+
+    No es fan servir llavors consecutives perquè el sorteig de cada any usa
+    seed + any*100: les rèpliques 0 i 100 compartirien sortejos desplaçats.
+    """
+    estat = np.random.SeedSequence(seed).generate_state(n_replicas)
+    return [int(s) for s in estat % 2**31]
+
+
+def _inicialitzar_worker(poblacio: pd.DataFrame, params: dict):
+    global _POBLACIO, _PARAMS_SIMULACIO
+    _POBLACIO = poblacio
+    _PARAMS_SIMULACIO = params
+
+
+def _executar_replica(seed: int):
+    """Simula una rèplica i en retorna només els comptatges i indicadors agregats."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_hist = simular_6_anys_variable(
+            _POBLACIO,
+            seed=seed,
+            output_csv=None,
+            **_PARAMS_SIMULACIO
+        )
+
+    df = df_hist[['any', 'Modalitat', 'adjudicats']].copy()
+    df['ratxa'] = np.clip(calcular_captures_consecutives(df_hist), -3, 3)
+
+    captures = (df.groupby(['any', 'Modalitat'])['adjudicats']
+                  .agg(caçadors='size', captures='sum')
+                  .reset_index())
+    ratxes = (df.groupby(['any', 'Modalitat', 'ratxa'])
+                .size()
+                .rename('caçadors')
+                .reset_index())
+    equitat = metriques_equitat(df_hist)
+    grups = equitat['grups'].drop(columns=[c for c in ('seed', 'escenari') if c in equitat['grups']])
+    bretxa = equitat['bretxa'][['any', 'taxa_A', 'taxa_B', 'bretxa']].copy()
+    for taula in (captures, ratxes, grups, bretxa):
+        taula['seed'] = seed
+    return captures, ratxes, grups, bretxa
+
+
+def _q(p):
+    def quantil(x):
+        return x.quantile(p)
+    quantil.__name__ = f"q{int(p * 100):02d}"
+    return quantil
+
+
+def simular_ensemble(
+    initial_csv,
+    captures_per_year_list: list,
+    n_replicas: int = 100,
+    seed: int = 0,
+    jobs: int = None,
+    **params_simulacio
+) -> dict:
+    """
+    Executa `simular_6_anys_variable` per a moltes llavors en paral·lel
+    (ProcessPoolExecutor, per defecte tots els nuclis) i n'agrega els resultats.
+
+    Les rèpliques no escriuen cap fitxer: cada procés retorna només els
+    comptatges per any i modalitat, i aquí se'n calculen les estadístiques.
+
+    Paràmetres
+    ----------
+    initial_csv : str o pd.DataFrame
+        CSV dins de data/ o DataFrame amb la població inicial.
+    captures_per_year_list : list
+        Captures de cada any (les mateixes per a totes les rèpliques).
+    n_replicas : int
+        Nombre de llavors a simular.
+    seed : int
+        Llavor base a partir de la qual es deriven les de cada rèplica.
+    jobs : int, opcional
+        Processos treballadors (None = os.cpu_count()).
+    **params_simulacio
+        Altres arguments de `simular_6_anys_variable` (min_colla_size,
+        new_hunters_range, ...).
+
+    Retorna
+    -------
+    dict amb els DataFrames:
+        - 'captures': mitjana, desviació i quantils de captures per any i modalitat
+        - 'ratxes': distribució de captures consecutives (-3..3) per any i modalitat
+        - 'replicas': captures per any, modalitat i rèplica
+        - 'equitat': mitjana i quantils dels indicadors d'equitat per grup
+          (modalitat i classe de colla, vegeu modules.equitat)
+        - 'bretxa': mitjana i quantils de la diferència de taxa A - B per any
+        - 'replicas_equitat': indicadors d'equitat per grup i rèplica
+    """
+    if isinstance(initial_csv, pd.DataFrame):
+        poblacio = initial_csv
+    else:
+        poblacio = llegir_inscrits(os.path.join('data', initial_csv), snapshot=True)
+
+    params = dict(params_simulacio, captures_per_year_list=captures_per_year_list)
+    seeds = llavors_replicas(n_replicas, seed)
+    jobs = jobs or os.cpu_count() or 1
+    chunksize = max(1, n_replicas // (jobs * 4))
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_inicialitzar_worker,
+        initargs=(poblacio, params)
+    ) as executor:
+        resultats = list(executor.map(_executar_replica, seeds, chunksize=chunksize))
+
+    df_captures = pd.concat([r[0] for r in resultats], ignore_index=True)
+    df_ratxes = pd.concat([r[1] for r in resultats], ignore_index=True)
+    df_equitat = pd.concat([r[2] for r in resultats], ignore_index=True)
+    df_bretxa = pd.concat([r[3] for r in resultats], ignore_index=True)
+    df_captures['taxa'] = df_captures['captures'] / df_captures['caçadors']
+
+    # --- Captures per any i modalitat
+    resum_captures = (df_captures.groupby(['any', 'Modalitat'])
+                      .agg(caçadors_mitjana=('caçadors', 'mean'),
+                           captures_mitjana=('captures', 'mean'),
+                           captures_std=('captures', 'std'),
+                           captures_q05=('captures', _q(0.05)),
+                           captures_q50=('captures', _q(0.50)),
+                           captures_q95=('captures', _q(0.95)),
+                           taxa_mitjana=('taxa', 'mean'))
+                      .reset_index())
+
+    # --- Distribució de ratxes (A vs B), omplint amb 0 els valors absents
+    ratxes = (df_ratxes.pivot_table(index=['seed', 'any', 'Modalitat'],
+                                    columns='ratxa', values='caçadors',
+                                    fill_value=0)
+                       .stack()
+                       .rename('caçadors')
+                       .reset_index())
+    totals = ratxes.groupby(['seed', 'any', 'Modalitat'])['caçadors'].transform('sum')
+    ratxes['percentatge'] = ratxes['caçadors'] / totals * 100
+
+    resum_ratxes = (ratxes.groupby(['any', 'Modalitat', 'ratxa'])
+                    .agg(caçadors_mitjana=('caçadors', 'mean'),
+                         percentatge_mitjana=('percentatge', 'mean'),
+                         percentatge_q05=('percentatge', _q(0.05)),
+                         percentatge_q95=('percentatge', _q(0.95)))
+                    .reset_index())
+
+    # --- Equitat per grup i bretxa A - B per any
+    resum_equitat = (df_equitat.groupby('grup', sort=False)
+                     .agg(caçadors_mitjana=('caçadors', 'mean'),
+                          gini_mitjana=('gini', 'mean'),
+                          gini_q05=('gini', _q(0.05)),
+                          gini_q95=('gini', _q(0.95)),
+                          variancia_mitjana=('adjudicats_variancia', 'mean'),
+                          ratxa_seca_mitjana=('ratxa_seca_mitjana', 'mean'),
+                          ratxa_seca_maxima_q95=('ratxa_seca_maxima', _q(0.95)))
+                     .reset_index())
+    resum_bretxa = (df_bretxa.groupby('any')
+                    .agg(bretxa_mitjana=('bretxa', 'mean'),
+                         bretxa_q05=('bretxa', _q(0.05)),
+                         bretxa_q95=('bretxa', _q(0.95)))
+                    .reset_index())
+
+    return {
+        'captures': resum_captures,
+        'ratxes': resum_ratxes,
+        'replicas': df_captures,
+        'equitat': resum_equitat,
+        'bretxa': resum_bretxa,
+        'replicas_equitat': df_equitat
+    }
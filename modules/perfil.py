@@ -0,0 +1,107 @@
+# modules/perfil.py
+
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+
+
+class Perfil:
+    """
+    Registre opcional de temps, comptadors i memòria per fases.
+
+    Les fases es poden niar; cada una es desa amb el camí complet
+    ('simulacio/sorteig/sobrants_colles') i, si es repeteix (un cop per any,
+    per exemple), se n'acumula el temps i el nombre de crides i es guarda el
+    pic de memòria més alt.
+
+        perfil = Perfil()
+        with perfil.fase('sorteig'):
+            perfil.comptar('nivells', 3)
+        perfil.desar_json('perfil.json')
+
+    Amb memoria=True es fa servir tracemalloc (el pic és la memòria reservada
+    per sobre de la que hi havia en entrar a la fase), cosa que alenteix
+    força l'execució; amb memoria=False només es mesura temps i comptadors.
+    """
+
+    def __init__(self, memoria: bool = True):
+        self.memoria = memoria
+        self.fases = {}
+        self._pila = []
+        self._tracemalloc_propi = False
+
+    @contextlib.contextmanager
+    def fase(self, nom: str):
+        cami = '/'.join([f['cami'] for f in self._pila[-1:]] + [nom])
+        marc = {'cami': cami, 'inici_mem': 0, 'pic': 0}
+
+        if self.memoria:
+            if not self._pila and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracemalloc_propi = True
+            actual, pic = tracemalloc.get_traced_memory()
+            if self._pila:
+                self._pila[-1]['pic'] = max(self._pila[-1]['pic'], pic)
+            tracemalloc.reset_peak()
+            marc['inici_mem'] = marc['pic'] = actual
+
+        self._pila.append(marc)
+        inici = time.perf_counter()
+        try:
+            yield self
+        finally:
+            temps = time.perf_counter() - inici
+            self._pila.pop()
+            registre = self.fases.setdefault(cami, {
+                'temps_s': 0.0, 'crides': 0, 'pic_memoria_bytes': None, 'comptadors': {}
+            })
+            registre['temps_s'] += temps
+            registre['crides'] += 1
+
+            if self.memoria:
+                pic = max(marc['pic'], tracemalloc.get_traced_memory()[1])
+                registre['pic_memoria_bytes'] = max(registre['pic_memoria_bytes'] or 0,
+                                                    pic - marc['inici_mem'])
+                if self._pila:
+                    self._pila[-1]['pic'] = max(self._pila[-1]['pic'], pic)
+                tracemalloc.reset_peak()
+                if not self._pila and self._tracemalloc_propi:
+                    tracemalloc.stop()
+                    self._tracemalloc_propi = False
+
+    def comptar(self, clau: str, n: int = 1):
+        """Suma `n` al comptador `clau` de la fase en curs."""
+        cami = self._pila[-1]['cami'] if self._pila else ''
+        registre = self.fases.setdefault(cami, {
+            'temps_s': 0.0, 'crides': 0, 'pic_memoria_bytes': None, 'comptadors': {}
+        })
+        registre['comptadors'][clau] = registre['comptadors'].get(clau, 0) + int(n)
+
+    def to_dict(self) -> dict:
+        return {'fases': {cami: dict(r, comptadors=dict(r['comptadors']))
+                          for cami, r in self.fases.items()}}
+
+    def desar_json(self, path: str) -> str:
+        carpeta = os.path.dirname(path)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        return path
+
+
+class _PerfilNul:
+    """Perfil desactivat: no mesura res i no té cap cost apreciable."""
+
+    _context = contextlib.nullcontext()
+
+    def fase(self, nom: str):
+        return self._context
+
+    def comptar(self, clau: str, n: int = 1):
+        pass
+
+
+PERFIL_NUL = _PerfilNul()
@@ -0,0 +1,159 @@
+# modules/probabilitats.py
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from modules.carrega import llegir_inscrits
+from modules.sorteig import planificar_sobrants_colles
+
+
+def repartir_sobrants_exacte(
+    caçadors: np.ndarray,
+    assignats: np.ndarray,
+    sobrants: int
+):
+    """
+    Versió exacta de sorteig.repartir_sobrants_colles: en lloc de sortejar,
+    recorre els mateixos nivells (colles empatades al rati mínim). Un nivell
+    sencer rep una captura per colla sense atzar (planificar_sobrants_colles);
+    només l'últim nivell, si hi ha menys captures (r) que colles (m), es
+    sorteja, i cada colla hi té una probabilitat r/m d'una captura més.
+
+    Retorna
+    -------
+    (np.ndarray, np.ndarray)
+        Captures segures de cada colla i probabilitat d'una captura addicional.
+    """
+    assignats, _, ultim_nivell, sobrants = planificar_sobrants_colles(caçadors, assignats, sobrants)
+    prob_extra = np.zeros(len(assignats))
+    if ultim_nivell:
+        prob_extra[ultim_nivell] = sobrants / len(ultim_nivell)
+    return assignats, prob_extra
+
+
+def _franges_per_grup(codis: np.ndarray, prioritat: np.ndarray, anys_sense_captura: np.ndarray):
+    """
+    Per a cada caçador amb grup, el nombre de membres del seu grup que el
+    precedeixen (Prioritat menor o, a igual Prioritat, més anys sense captura)
+    i la mida de la seva franja (mateixa Prioritat i anys_sense_captura).
+    """
+    idx = np.flatnonzero(codis >= 0)
+    grup = codis[idx]
+    p = prioritat[idx]
+    a = anys_sense_captura[idx]
+
+    ordre = np.lexsort((-a, p, grup))
+    g, p, a = grup[ordre], p[ordre], a[ordre]
+    nova = np.r_[True, (g[1:] != g[:-1]) | (p[1:] != p[:-1]) | (a[1:] != a[:-1])]
+    inici_franja = np.flatnonzero(nova)
+    mida_franja = np.diff(np.r_[inici_franja, len(g)])
+    franja = np.cumsum(nova) - 1
+
+    mides = np.bincount(grup)
+    inici_grup = np.cumsum(mides) - mides
+
+    davant = np.empty(len(idx), dtype=np.int64)
+    franja_mida = np.empty(len(idx), dtype=np.int64)
+    davant[ordre] = inici_franja[franja] - inici_grup[g]
+    franja_mida[ordre] = mida_franja[franja]
+    return idx, grup, davant, franja_mida, mides
+
+
+def _probabilitats_grups(grup, davant, franja, mides, places):
+    """
+    Adjudicacions esperades i probabilitat d'almenys una captura de cada
+    caçador quan el grup té `places` places (sorteig.assignar_places_per_grup):
+    tothom rep places // mida passades completes i la `resta` es dona per
+    ordre de franja. Els de les franges de davant entren segur, i els de la
+    franja del tall comparteixen les places que queden a parts iguals.
+    """
+    places = np.asarray(places, dtype=np.int64)
+    completes = places // np.maximum(mides, 1)
+    resta = places - completes * mides
+    extra = np.clip((resta[grup] - davant) / franja, 0.0, 1.0)
+    esperades = completes[grup] + extra
+    prob = np.where(completes[grup] >= 1, 1.0, extra)
+    return esperades, prob
+
+
+def probabilitats_sorteig(df: pd.DataFrame, total_captures: int) -> dict:
+    """
+    Probabilitats exactes del sorteig d'un any (sorteig.assignar_isards_sorteig)
+    per a una població i un nombre de captures, sense cap simulació.
+
+    Les regles són deterministes excepte els desempats a l'atzar: el sorteig
+    de l'últim nivell de sobrants entre colles i el desempat dins de la franja
+    (Prioritat, anys_sense_captura) on cau el tall de cada grup. Totes dues
+    coses són sortejos uniformes sense reemplaçament, de manera que cada
+    membre rep una part proporcional de les places que queden.
+
+    Retorna
+    -------
+    dict amb els DataFrames:
+        - 'caçadors': el DataFrame d'entrada amb 'prob_captura' (probabilitat
+          d'almenys una captura) i 'adjudicats_esperats'
+        - 'colles': per colla, caçadors, places segures, probabilitat d'una
+          plaça addicional i places esperades; la modalitat B surt com una
+          fila amb Colla_ID buit
+    """
+    required_cols = {'ID', 'Modalitat', 'Prioritat', 'Colla_ID', 'anys_sense_captura'}
+    if not required_cols.issubset(df.columns):
+        raise ValueError(f"Falten columnes obligatòries: {required_cols - set(df.columns)}")
+    df = df.copy()
+
+    # --- Repartiment A/B i per colla, com al sorteig
+    es_A = (df['Modalitat'] == 'A').to_numpy()
+    es_B = (df['Modalitat'] == 'B').to_numpy()
+    total_applicants = int(es_A.sum() + es_B.sum())
+    ratio = math.ceil(total_applicants / total_captures)
+    n_indiv = round(total_captures * int(es_B.sum()) / total_applicants)
+    n_colla = total_captures - n_indiv
+
+    colles_df = df[es_A].groupby('Colla_ID', observed=True).size().reset_index(name='caçadors')
+    floor = (colles_df['caçadors'] // ratio).astype(int).to_numpy()
+    segures, prob_extra = repartir_sobrants_exacte(
+        colles_df['caçadors'].to_numpy(), floor, n_colla - floor.sum()
+    )
+
+    # --- Grups: cada colla i, com a últim grup, la modalitat B
+    codi_colla = pd.Index(colles_df['Colla_ID']).get_indexer(df['Colla_ID'])
+    codis = np.where(es_A, codi_colla, -1)
+    codis[es_B] = len(colles_df)
+    places = np.append(segures, max(n_indiv, 0))
+    q = np.append(prob_extra, 0.0)
+
+    idx, grup, davant, franja, mides = _franges_per_grup(
+        codis,
+        df['Prioritat'].to_numpy(dtype=float),
+        df['anys_sense_captura'].to_numpy(dtype=float)
+    )
+    mides = np.pad(mides, (0, len(places) - len(mides)))
+
+    # Barreja segons si el grup rep la plaça addicional (probabilitat q)
+    esperades_0, prob_0 = _probabilitats_grups(grup, davant, franja, mides, places)
+    esperades_1, prob_1 = _probabilitats_grups(grup, davant, franja, mides, places + 1)
+    qg = q[grup]
+
+    esperades = np.zeros(len(df))
+    prob = np.zeros(len(df))
+    esperades[idx] = (1 - qg) * esperades_0 + qg * esperades_1
+    prob[idx] = (1 - qg) * prob_0 + qg * prob_1
+    df['prob_captura'] = prob
+    df['adjudicats_esperats'] = esperades
+
+    colles = pd.DataFrame({
+        'Colla_ID': list(colles_df['Colla_ID']) + [None],
+        'Modalitat': ['A'] * len(colles_df) + ['B'],
+        'caçadors': mides[:len(places)],
+        'places_segures': places,
+        'prob_plaça_extra': q,
+        'places_esperades': places + q,
+    })
+    return {'caçadors': df, 'colles': colles}
+
+
+def probabilitats_sorteig_csv(file_csv: str, total_captures: int) -> dict:
+    """Com probabilitats_sorteig, llegint els inscrits d'un CSV."""
+    return probabilitats_sorteig(llegir_inscrits(file_csv), total_captures)
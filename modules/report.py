@@ -1,6 +1,18 @@
 # modules/report.py
 import os
-import pandas as pd
+
+from modules.historial import llegir_historial
+from modules.analisi import resum_per_any, FIGURES
+from modules.equitat import metriques_equitat, MIDA_COLLA_GRAN
+
+# Noms dels grups a la taula d'equitat
+NOMS_GRUPS_EQUITAT = {
+    'A': 'Colla (A)',
+    'B': 'Individual (B)',
+    'A_petita': 'Colles petites (mida mínima de l\'any)',
+    'A_mitjana': 'Colles mitjanes',
+    'A_gran': f'Colles grans ({MIDA_COLLA_GRAN + 1} o més)',
+}
 
 def generar_report_escenari(
     nom_escenari: str,
@@ -9,17 +21,30 @@ def generar_report_escenari(
     new_hunters_per_year,        # int or (min,max)
     retired_hunters_per_year,    # int or (min,max)
     output_dir: str = 'reports',
-    index_escenari: int = None   # <- Nou paràmetre opcional
+    index_escenari: int = None,  # <- Nou paràmetre opcional
+    hist_path: str = os.path.join('data', 'historial_6_anys.csv'),
+    resum: dict = None,
+    format_figures: str = 'png'
 ) -> None:
     """
-    Llegeix data/historial_6_anys.csv i genera un .md amb:
+    Genera un .md amb:
       - paràmetres d'escenari
       - taula evolutiva real (captures + colla vs individuals)
       - gràfics (heatmap + barres)
+      - indicadors d'equitat (Gini, variància, ratxes seques i bretxa A - B)
+
+    La taula surt de `resum` (modules.analisi.resumir_historial) si es dona;
+    si no, es llegeix l'historial de `hist_path` (CSV o partició Parquet).
+    Les figures s'enllacen amb l'extensió `format_figures`.
     """
-    # 1) llegir historial complet
-    hist_path = os.path.join('data', 'historial_6_anys.csv')
-    df = pd.read_csv(hist_path)
+    # 1) taula d'evolució per any i indicadors d'equitat
+    if resum is not None:
+        evolucio = resum['anys']
+        equitat = resum['equitat']
+    else:
+        historial = llegir_historial(hist_path, columnes=['ID', 'any', 'Modalitat', 'Colla_ID', 'adjudicats'])
+        evolucio = resum_per_any(historial)
+        equitat = metriques_equitat(historial)
 
     # 2) paràmetres text
     def fmt_range(v):
@@ -58,33 +83,42 @@ def generar_report_escenari(
 
         f.write("| Any | Captures | Caçadors Totals | Colla | Individuals |\n")
         f.write("|:--:|:--------:|:---------------:|:-----:|:-----------:|\n")
-        anys = sorted(df['any'].astype(int).unique())
-        for anyo in anys:
-            sub = df[df['any'] == anyo]
-            captures = sub['adjudicats'].sum()
-            tot = sub['ID'].nunique()
-            colla = sub[sub['Modalitat'] == 'A']['ID'].nunique()
-            indiv = sub[sub['Modalitat'] == 'B']['ID'].nunique()
-            f.write(f"| {anyo} | {captures} | {tot} | {colla} | {indiv} |\n")
+        for fila in evolucio.itertuples(index=False):
+            f.write(f"| {fila.any} | {fila.captures} | {fila.cacadors_total} | "
+                    f"{fila.cacadors_colla} | {fila.cacadors_individual} |\n")
 
         # 4) gràfics
         if index_escenari is not None:
             f.write(f"\n## {index_escenari}.2. Heatmap de Captures Consecutives\n\n")
         else:
             f.write("\n## 2. Heatmap de Captures Consecutives\n\n")
-        f.write(f"![Heatmap](../figures/{nom_escenari}/heatmap_captures_consecutives_final.png)\n\n")
+        f.write(f"![Heatmap](../figures/{nom_escenari}/{FIGURES['heatmap']}.{format_figures})\n\n")
 
         if index_escenari is not None:
             f.write(f"## {index_escenari}.3. Barres Apilades captures consecutives o anys consecutius sense captura\n\n")
         else:
             f.write("## 3.Barres Apilades captures consecutives o anys consecutius sense captura\n\n")
-        f.write(f"![Barres](../figures/{nom_escenari}/stacked_grouped_bar_percentatges_separat.png)\n")
+        f.write(f"![Barres](../figures/{nom_escenari}/{FIGURES['barres_modalitat']}.{format_figures})\n")
 
         if index_escenari is not None:
             f.write(f"## {index_escenari}.4. Barres Apilades captures consecutives o anys consecutius sense captura Colles petites ({min_colla_size} caçadors) vs Colles grans (11 o més caçadors)\n\n")
         else:
             f.write("## 4 .Barres Apilades captures consecutives o anys consecutius sense captura Colles petites ({min_colla_size} caçadors) vs Colles grans (11 o més caçadors)\n\n")
-        f.write(f"![Barres](../figures/{nom_escenari}/stacked_grouped_bar_petites_vs_grans.png)\n")
+        f.write(f"![Barres](../figures/{nom_escenari}/{FIGURES['barres_petites_grans']}.{format_figures})\n")
+
+        # 5) equitat
+        if index_escenari is not None:
+            f.write(f"\n## {index_escenari}.5. Indicadors d'equitat\n\n")
+        else:
+            f.write("\n## 5. Indicadors d'equitat\n\n")
+        f.write("| Grup | Caçadors | Captures/caçador | Variància | Gini | Ratxa seca mitjana | Ratxa seca màxima |\n")
+        f.write("|:----:|:--------:|:----------------:|:---------:|:----:|:------------------:|:-----------------:|\n")
+        for fila in equitat['grups'].itertuples(index=False):
+            f.write(f"| {NOMS_GRUPS_EQUITAT.get(fila.grup, fila.grup)} | {fila.caçadors} | "
+                    f"{fila.adjudicats_mitjana:.2f} | {fila.adjudicats_variancia:.2f} | {fila.gini:.3f} | "
+                    f"{fila.ratxa_seca_mitjana:.2f} | {fila.ratxa_seca_maxima} |\n")
+        bretxa = equitat['bretxa']['bretxa'].mean() * 100
+        f.write(f"\n**Diferència de taxa de captura A - B (mitjana anual):** {bretxa:+.1f} punts percentuals\n")
     print(f"✅ Informe generat: {report_md}")
 
 def combinar_markdowns(noms_escenaris, output_md='reports/final_report.md'):
@@ -4,141 +4,464 @@ import pandas as pd
 import numpy as np
 import os
 import random
-from modules.sorteig import assignar_isards_sorteig_csv
+import pickle
+from modules.sorteig import assignar_isards_sorteig
 from modules.generador import generate_colla_sizes
+from modules.perfil import PERFIL_NUL
+from modules.carrega import llegir_inscrits
+
+def aplicar_rotacio(
+    df: pd.DataFrame,
+    anyo: int,
+    rng,
+    pid: int,
+    min_colla_size: int = 8,
+    new_hunters_range: tuple = (0, 0),
+    retired_hunters_range: tuple = (0, 0),
+    perfil=None
+):
+    """
+    Aplica les retirades, els nous caçadors i el requilibri de colles d'un any.
+    Retorna el DataFrame resultant i el següent ID disponible.
+    """
+    perfil = perfil or PERFIL_NUL
+    # --- Retirades ---
+    if isinstance(retired_hunters_range, tuple) and retired_hunters_range != (0, 0):
+        n_retire = rng.randint(retired_hunters_range[0],
+                               retired_hunters_range[1] + 1)
+        if n_retire > 0 and len(df) > n_retire:
+            drop_ids = rng.choice(df['ID'], size=n_retire, replace=False)
+            df = df[~df['ID'].isin(drop_ids)]
+            perfil.comptar('retirats', n_retire)
+            print(f"🚪 {n_retire} caçadors retirats en l'any {anyo}")
+
+    # --- Nous caçadors ---
+    if isinstance(new_hunters_range, tuple) and new_hunters_range != (0, 0):
+        n_new = rng.randint(new_hunters_range[0],
+                            new_hunters_range[1] + 1)
+        if n_new > 0:
+            # 30% a colles existents, 30% a colles noves, 40% individus
+            to_exist = int(n_new * 0.3)
+            to_new   = int(n_new * 0.3)
+            to_ind   = n_new - to_exist - to_new
+
+            # a) Afegir a colles EXISTENTS (mateixes tirades que una per caçador)
+            exist_collas = df.loc[df['Modalitat']=='A','Colla_ID'] \
+                            .dropna().unique()
+            if not len(exist_collas):
+                to_exist = 0
+            colles_exist = rng.choice(exist_collas, size=to_exist) if to_exist else []
+
+            # b) Crear colles NOVES (mida mínima), anomenades pel primer ID de cada colla
+            inici_noves = pid + to_exist
+            n_colles = int(np.ceil(to_new / min_colla_size))
+            noms_noves = [f'NovaColla_{inici_noves + j * min_colla_size}' for j in range(n_colles)]
+            colles_noves = np.repeat(noms_noves, min_colla_size)[:to_new]
+
+            # c) Afegir individus
+            n_afegits = to_exist + to_new + to_ind
+            new_hunters = pd.DataFrame({
+                'ID': pid + np.arange(n_afegits),
+                'Modalitat': ['A'] * (to_exist + to_new) + ['B'] * to_ind,
+                'Prioritat': 3,
+                'Colla_ID': np.concatenate([
+                    np.asarray(colles_exist, dtype=object),
+                    colles_noves.astype(object),
+                    np.full(to_ind, np.nan, dtype=object)
+                ]),
+                'anys_sense_captura': 0
+            })
+            pid += n_afegits
+
+            df = pd.concat([df, new_hunters], ignore_index=True)
+            perfil.comptar('nous', n_afegits)
+            print(f"🧑‍🌾 {len(new_hunters)} nous caçadors afegits en l'any {anyo}")
+
+    # --- Requilibrar colles perquè tinguin mínim de membres ---
+    # Una sola permutació dels individus: cada colla petita n'agafa el tros
+    # següent (mateixa distribució que mostrejar-los colla a colla).
+    col_counts = df.loc[df['Modalitat']=='A', 'Colla_ID'].value_counts()
+    falten = (min_colla_size - col_counts)[col_counts < min_colla_size]
+    if len(falten):
+        files_indiv = np.flatnonzero((df['Modalitat'] == 'B').to_numpy())
+        destins, n_moguts = [], 0
+        for cid, need in falten.items():
+            if len(files_indiv) - n_moguts >= need:
+                destins.append((cid, need))
+                n_moguts += need
+
+        if n_moguts:
+            files = files_indiv[rng.permutation(len(files_indiv))[:n_moguts]]
+            df = df.copy()
+            df.iloc[files, df.columns.get_loc('Modalitat')] = 'A'
+            df.iloc[files, df.columns.get_loc('Colla_ID')] = np.repeat(
+                np.array([cid for cid, _ in destins], dtype=object),
+                [need for _, need in destins]
+            )
+            perfil.comptar('reassignats', n_moguts)
+            print(f"🛠️ Reassignats {n_moguts} caçadors a {len(destins)} colles per mantenir mida mínima")
+
+    return df, pid
+
+
+def _es_rang(valor) -> bool:
+    """Un rang (min, max): qualsevol seqüència de dos enters (tupla, llista de JSON/YAML...)."""
+    return (isinstance(valor, (list, tuple)) and len(valor) == 2
+            and all(isinstance(x, (int, np.integer)) and not isinstance(x, bool) for x in valor))
+
+
+def _es_rang_per_any(valor) -> bool:
+    return isinstance(valor, (list, tuple)) and len(valor) > 0 and all(_es_rang(r) for r in valor)
+
+
+def _validar_rang(rang, num_anys: int, nom: str):
+    """
+    Comprova un rang de rotació a l'entrada de la simulació: un sol rang, una
+    llista amb un rang per any (almenys `num_anys`) o un valor sense rotació
+    (p. ex. 0). Una seqüència que no és cap de les dues coses és un error.
+    """
+    if _es_rang_per_any(rang):
+        if len(rang) < num_anys:
+            raise ValueError(f"{nom} té {len(rang)} rangs per any però la simulació en té {num_anys}")
+    elif isinstance(rang, (list, tuple)) and not _es_rang(rang):
+        raise ValueError(f"{nom} ha de ser un rang (min, max) o una llista de rangs per any: {rang!r}")
+
+
+def _rang_any(rang, anyo: int):
+    """
+    Rang de rotació efectiu d'un any. `rang` pot ser un sol rang per a tots
+    els anys o una llista de rangs (un per any), com a tuples o llistes.
+    Retorna una tupla, o None si aquell any no hi ha rotació (aplicar_rotacio
+    només actua amb tuples diferents de (0, 0)).
+    """
+    if _es_rang_per_any(rang):
+        rang = rang[anyo - 1]
+    if not _es_rang(rang):
+        return None
+    rang = tuple(int(x) for x in rang)
+    return rang if rang != (0, 0) else None
+
+
+def simular_any(
+    df: pd.DataFrame,
+    anyo: int,
+    captures: int,
+    rng,
+    pid: int,
+    seed: int = None,
+    min_colla_size: int = 8,
+    max_colla_size: int = 20,
+    new_hunters_range: tuple = (0, 0),
+    retired_hunters_range: tuple = (0, 0),
+    perfil=None
+):
+    """
+    Simula un any: rotació de caçadors (excepte any 1) i sorteig.
+
+    Els rangs de rotació poden ser un sol rang o una llista amb un rang per
+    any, com a tuples o llistes (vegeu _rang_any).
+
+    Retorna (df_out, df_seguent, pid): el resultat del sorteig amb la columna
+    'any', la població per a l'any següent i el següent ID disponible.
+    """
+    perfil = perfil or PERFIL_NUL
+    print(f"🛠️ Preparant any {anyo} amb {captures} captures...")
+
+    # 1) Retirades i incorporacions *abans* del sorteig (excepte any 1)
+    if anyo > 1:
+        with perfil.fase('rotacio'):
+            df, pid = aplicar_rotacio(df, anyo, rng, pid, min_colla_size,
+                                      _rang_any(new_hunters_range, anyo),
+                                      _rang_any(retired_hunters_range, anyo),
+                                      perfil)
+
+    # 2) Assignar captures
+    with perfil.fase('sorteig'):
+        df_out = assignar_isards_sorteig(
+            df,
+            total_captures=captures,
+            seed=(seed + anyo * 100) if seed is not None else anyo * 100,
+            perfil=perfil
+        )
+        df_out['any'] = anyo
+
+    # 3) Prepara df per al pròxim any
+    with perfil.fase('preparacio_any_seguent'):
+        df_seguent = (df_out[['ID', 'Modalitat', 'Colla_ID',
+                              'nova_prioritat', 'nou_anys_sense_captura']]
+                      .rename(columns={
+                          'nova_prioritat': 'Prioritat',
+                          'nou_anys_sense_captura': 'anys_sense_captura'
+                      }))
+    return df_out, df_seguent, pid
+
+
+def desar_checkpoint(checkpoint_dir: str, estat: dict) -> str:
+    """
+    Desa l'estat d'un any acabat a <checkpoint_dir>/any_<n>.pkl: població per
+    a l'any següent, resultat del sorteig, estat del generador aleatori,
+    següent ID i paràmetres. L'escriptura és atòmica.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    path = os.path.join(checkpoint_dir, f"any_{estat['any']}.pkl")
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(estat, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def carregar_checkpoint(checkpoint_dir: str, anyo: int = None) -> dict:
+    """Carrega el checkpoint de l'any indicat (per defecte, l'últim desat)."""
+    if anyo is None:
+        anys = [int(f[4:-4]) for f in os.listdir(checkpoint_dir)
+                if f.startswith('any_') and f.endswith('.pkl')]
+        if not anys:
+            raise FileNotFoundError(f"No hi ha cap checkpoint a {checkpoint_dir}")
+        anyo = max(anys)
+    with open(os.path.join(checkpoint_dir, f"any_{anyo}.pkl"), 'rb') as f:
+        return pickle.load(f)
+
+
+def _simular_anys(
+    df: pd.DataFrame,
+    rng,
+    pid: int,
+    captures_per_year_list: list,
+    any_inici: int,
+    historial: list,
+    params: dict,
+    desar_resultats_anuals: bool = False,
+    checkpoint_dir: str = None,
+    perfil=None
+) -> pd.DataFrame:
+    """Bucle comú de simulació des de `any_inici` fins al final de la llista de captures."""
+    perfil = perfil or PERFIL_NUL
+    for nom in ('new_hunters_range', 'retired_hunters_range'):
+        _validar_rang(params[nom], len(captures_per_year_list), nom)
+    with perfil.fase('simulacio'):
+        for anyo in range(any_inici, len(captures_per_year_list) + 1):
+            perfil.comptar('anys')
+            df_out, df, pid = simular_any(df, anyo, captures_per_year_list[anyo - 1],
+                                          rng, pid, perfil=perfil, **params)
+            if desar_resultats_anuals:
+                with perfil.fase('resultats_anuals'):
+                    df_out.drop(columns=['any']).to_csv(f"data/resultats_any_{anyo}.csv", index=False)
+            historial.append(df_out)
+
+            if checkpoint_dir is not None:
+                with perfil.fase('checkpoint'):
+                    desar_checkpoint(checkpoint_dir, {
+                        'any': anyo,
+                        'poblacio': df,
+                        'resultat': df_out,
+                        'rng_state': rng.get_state(),
+                        'pid': pid,
+                        'params': params
+                    })
+
+        with perfil.fase('concatenacio'):
+            return pd.concat(historial, ignore_index=True)
+
+
+def _desar_historial_csv(df_hist: pd.DataFrame, output_csv: str):
+    if output_csv is not None:
+        df_hist.to_csv(output_csv, index=False)
+        print(f"✅ Simulació completa i desada a {output_csv}")
+
 
 def simular_6_anys_variable(
-    initial_csv: str,
+    initial_csv,
     captures_per_year_list: list,
     seed: int = None,
     min_colla_size: int = 8,
     max_colla_size: int = 20,
     new_hunters_range: tuple = (0, 0),
-    retired_hunters_range: tuple = (0, 0)
+    retired_hunters_range: tuple = (0, 0),
+    desar_resultats_anuals: bool = False,
+    output_csv: str = os.path.join('data', 'historial_6_anys.csv'),
+    checkpoint_dir: str = None,
+    perfil=None
 ) -> pd.DataFrame:
     """
     Simula l'assignació de captures durant diversos anys.
     Aplica retirades i nous caçadors *abans* de cada sorteig (excepte any 1),
-    i sempre manté la mida mínima de colla.
+    i sempre manté la mida mínima de colla. Els rangs de rotació poden ser un
+    sol rang o una llista amb un rang per any, p. ex. [(0, 0), (0, 0), (1, 10), ...].
+
+    `initial_csv` pot ser el nom d'un CSV dins de data/ o directament un
+    DataFrame d'inscrits. El sorteig de cada any es fa en memòria; només es
+    desa data/resultats_any_{n}.csv si `desar_resultats_anuals` és True.
+    L'historial complet es desa a `output_csv` (None per no desar-lo).
+
+    Si es dona `checkpoint_dir`, al final de cada any s'hi desa un checkpoint
+    amb què `reprendre_simulacio` pot continuar o allargar la simulació.
+
+    Amb un `perfil` (modules.perfil.Perfil) es registra el temps, la memòria i
+    els comptadors de cada fase (rotació, sorteig i les seves subfases...),
+    acumulats sobre tots els anys.
     """
+    perfil = perfil or PERFIL_NUL
 
     rng = np.random.RandomState(seed) if seed is not None else np.random
-    df = pd.read_csv(os.path.join('data', initial_csv), sep=';')
-    historial = []
+    if isinstance(initial_csv, pd.DataFrame):
+        df = initial_csv.copy()
+    else:
+        with perfil.fase('lectura_csv'):
+            df = llegir_inscrits(os.path.join('data', initial_csv), snapshot=True)
+    # Les colles canvien cada any (colles noves, reassignacions): text, no categories
+    df['Colla_ID'] = df['Colla_ID'].astype(object)
     pid = int(df['ID'].max()) + 1  # següent ID disponible
 
-    for anyo, captures in enumerate(captures_per_year_list, start=1):
-        print(f"🛠️ Preparant any {anyo} amb {captures} captures...")
-
-        # 1) Retirades i incorporacions *abans* del sorteig (excepte any 1)
-        if anyo > 1:
-            # --- Retirades ---
-            if isinstance(retired_hunters_range, tuple) and retired_hunters_range != (0, 0):
-                n_retire = rng.randint(retired_hunters_range[0],
-                                       retired_hunters_range[1] + 1)
-                if n_retire > 0 and len(df) > n_retire:
-                    drop_ids = rng.choice(df['ID'], size=n_retire, replace=False)
-                    df = df[~df['ID'].isin(drop_ids)]
-                    print(f"🚪 {n_retire} caçadors retirats en l'any {anyo}")
-
-            # --- Nous caçadors ---
-            if isinstance(new_hunters_range, tuple) and new_hunters_range != (0, 0):
-                n_new = rng.randint(new_hunters_range[0],
-                                    new_hunters_range[1] + 1)
-                if n_new > 0:
-                    new_hunters = []
-                    # 30% a colles existents, 30% a colles noves, 40% individus
-                    to_exist = int(n_new * 0.3)
-                    to_new   = int(n_new * 0.3)
-                    to_ind   = n_new - to_exist - to_new
-
-                    # a) Afegir a colles EXISTENTS
-                    exist_collas = df.loc[df['Modalitat']=='A','Colla_ID'] \
-                                    .dropna().unique()
-                    for _ in range(to_exist):
-                        if not len(exist_collas):
-                            break
-                        cid = rng.choice(exist_collas)
-                        new_hunters.append({
-                            'ID': pid,
-                            'Modalitat': 'A',
-                            'Prioritat': 3,
-                            'Colla_ID': cid,
-                            'anys_sense_captura': 0
-                        })
-                        pid += 1
-
-                    # b) Crear colles NOVES (mida mínima)
-                    n_colles = int(np.ceil(to_new / min_colla_size))
-                    for _ in range(n_colles):
-                        cname = f'NovaColla_{pid}'
-                        for _ in range(min_colla_size):
-                            if to_new <= 0:
-                                break
-                            new_hunters.append({
-                                'ID': pid,
-                                'Modalitat': 'A',
-                                'Prioritat': 3,
-                                'Colla_ID': cname,
-                                'anys_sense_captura': 0
-                            })
-                            pid += 1
-                            to_new -= 1
-
-                    # c) Afegir individus
-                    for _ in range(to_ind):
-                        new_hunters.append({
-                            'ID': pid,
-                            'Modalitat': 'B',
-                            'Prioritat': 3,
-                            'Colla_ID': np.nan,
-                            'anys_sense_captura': 0
-                        })
-                        pid += 1
-
-                    df = pd.concat([df, pd.DataFrame(new_hunters)],
-                                   ignore_index=True)
-                    print(f"🧑‍🌾 {len(new_hunters)} nous caçadors afegits en l'any {anyo}")
-
-            # --- Requilibrar colles perquè tinguin mínim de membres ---
-            col_counts = df.loc[df['Modalitat']=='A', 'Colla_ID'].value_counts()
-            for cid, cnt in col_counts.items():
-                if cnt < min_colla_size:
-                    need = min_colla_size - cnt
-                    indiv = df[df['Modalitat']=='B']
-                    if len(indiv) >= need:
-                        move_idx = indiv.sample(need, random_state=rng).index
-                        df.loc[move_idx, 'Modalitat'] = 'A'
-                        df.loc[move_idx, 'Colla_ID']   = cid
-                        print(f"🛠️ Reassignats {need} caçadors a {cid} per mantenir mida mínima")
-
-        # 2) Desa estat actual abans del sorteig
-        temp_in = f"data/temp_any_{anyo}.csv"
-        df.to_csv(temp_in, sep=';', index=False)
-
-        # 3) Assignar captures
-        df_out = assignar_isards_sorteig_csv(
-            file_csv=temp_in,
-            total_captures=captures,
-            output_csv=f"data/resultats_any_{anyo}.csv",
-            seed=(seed + anyo * 100) if seed is not None else anyo * 100
-        )
-        df_out['any'] = anyo
-        historial.append(df_out)
-
-        # 4) Prepara df per al pròxim any
-        df = (df_out[['ID', 'Modalitat', 'Colla_ID',
-                      'nova_prioritat', 'nou_anys_sense_captura']]
-              .rename(columns={
-                  'nova_prioritat': 'Prioritat',
-                  'nou_anys_sense_captura': 'anys_sense_captura'
-              }))
-
-        # 5) Neteja fitxer temporal
-        os.remove(temp_in)
-
-    # 6) Concatena i desa l'historial complet
-    df_hist = pd.concat(historial, ignore_index=True)
-    df_hist.to_csv('data/historial_6_anys.csv', index=False)
-    print("✅ Simulació completa i desada a data/historial_6_anys.csv")
+    params = {
+        'seed': seed,
+        'min_colla_size': min_colla_size,
+        'max_colla_size': max_colla_size,
+        'new_hunters_range': new_hunters_range,
+        'retired_hunters_range': retired_hunters_range
+    }
+    df_hist = _simular_anys(df, rng, pid, captures_per_year_list, 1, [], params,
+                            desar_resultats_anuals, checkpoint_dir, perfil)
+    with perfil.fase('escriptura_csv'):
+        _desar_historial_csv(df_hist, output_csv)
+    return df_hist
+
+
+def entrada_any(escenari: dict, anyo: int) -> tuple:
+    """
+    Entrades que determinen el resultat d'un any d'un escenari: dos escenaris
+    amb les mateixes entrades fins a un any comparteixen la simulació fins
+    aquí. L'any 1 no té rotació, de manera que només hi compten les captures.
+    """
+    captures = escenari['captures_per_any'][anyo - 1]
+    if anyo == 1:
+        return (captures,)
+    return (captures,
+            escenari.get('min_colla', 8),
+            _rang_any(escenari.get('new_hunters_per_year', (0, 0)), anyo),
+            _rang_any(escenari.get('retired_hunters_per_year', (0, 0)), anyo))
+
+
+def _bifurcar_rng(rng: np.random.RandomState) -> np.random.RandomState:
+    copia = np.random.RandomState()
+    copia.set_state(rng.get_state())
+    return copia
+
+
+def simular_arbre_escenaris(
+    initial_csv,
+    escenaris: list,
+    seed: int,
+    perfil=None
+) -> dict:
+    """
+    Simula un lot d'escenaris que parteixen de la mateixa població i llavor
+    compartint els anys comuns.
+
+    Cada escenari és un dict com els de config_escenaris ('nom',
+    'captures_per_any', 'min_colla', 'max_colla', 'new_hunters_per_year',
+    'retired_hunters_per_year'); els rangs de rotació poden ser un sol rang o
+    una llista amb un rang per any (p. ex. rotació només a partir de l'any 3).
+
+    Els escenaris s'agrupen en un arbre pel prefix d'entrades anuals
+    (entrada_any): cada any d'un prefix compartit es simula un sol cop i, on
+    els escenaris divergeixen, es bifurca la població, l'estat del generador
+    aleatori i el següent ID. El resultat de cada escenari és idèntic al de
+    simular-lo sol amb simular_6_anys_variable.
+
+    Retorna {nom: historial}.
+    """
+    if seed is None:
+        raise ValueError("simular_arbre_escenaris necessita una llavor per poder bifurcar l'estat aleatori")
+    perfil = perfil or PERFIL_NUL
+
+    if isinstance(initial_csv, pd.DataFrame):
+        df = initial_csv.copy()
+    else:
+        with perfil.fase('lectura_csv'):
+            df = llegir_inscrits(os.path.join('data', initial_csv), snapshot=True)
+    df['Colla_ID'] = df['Colla_ID'].astype(object)
+    pid = int(df['ID'].max()) + 1
+
+    for escenari in escenaris:
+        for nom in ('new_hunters_per_year', 'retired_hunters_per_year'):
+            _validar_rang(escenari.get(nom, (0, 0)), len(escenari['captures_per_any']),
+                          f"{escenari['nom']}: {nom}")
+
+    resultats = {}
+    anys_sense_arbre = sum(len(e['captures_per_any']) for e in escenaris)
+    anys_simulats = 0
+
+    # Recorregut en profunditat: (població, rng, pid, any, historial del prefix, escenaris)
+    pila = [(df, np.random.RandomState(seed), pid, 1, [], list(escenaris))]
+    with perfil.fase('simulacio'):
+        while pila:
+            df, rng, pid, anyo, historial, grup = pila.pop()
+            branques = {}
+            for escenari in grup:
+                if len(escenari['captures_per_any']) < anyo:
+                    with perfil.fase('concatenacio'):
+                        resultats[escenari['nom']] = pd.concat(historial, ignore_index=True)
+                else:
+                    branques.setdefault(entrada_any(escenari, anyo), []).append(escenari)
+
+            for k, fills in enumerate(branques.values()):
+                # L'última branca reutilitza l'estat; les altres en fan una còpia
+                if k == len(branques) - 1:
+                    df_b, rng_b = df, rng
+                else:
+                    df_b, rng_b = df.copy(), _bifurcar_rng(rng)
+                    perfil.comptar('bifurcacions')
+                escenari = fills[0]
+                perfil.comptar('anys')
+                anys_simulats += 1
+                df_out, df_seguent, pid_b = simular_any(
+                    df_b, anyo, escenari['captures_per_any'][anyo - 1], rng_b, pid,
+                    seed=seed,
+                    min_colla_size=escenari.get('min_colla', 8),
+                    max_colla_size=escenari.get('max_colla', 20),
+                    new_hunters_range=escenari.get('new_hunters_per_year', (0, 0)),
+                    retired_hunters_range=escenari.get('retired_hunters_per_year', (0, 0)),
+                    perfil=perfil
+                )
+                pila.append((df_seguent, rng_b, pid_b, anyo + 1, historial + [df_out], fills))
+
+    print(f"🌳 {len(escenaris)} escenaris: {anys_simulats} anys simulats en lloc de {anys_sense_arbre}")
+    return resultats
+
+
+def reprendre_simulacio(
+    checkpoint_dir: str,
+    captures_per_year_list: list,
+    any_checkpoint: int = None,
+    desar_resultats_anuals: bool = False,
+    output_csv: str = os.path.join('data', 'historial_6_anys.csv'),
+    perfil=None
+) -> pd.DataFrame:
+    """
+    Continua una simulació des d'un checkpoint de `simular_6_anys_variable`.
+
+    `captures_per_year_list` és la llista completa de captures des de l'any 1;
+    si és més llarga que l'original, la simulació s'allarga. Es restaura la
+    població, l'estat del generador aleatori i el següent ID, de manera que el
+    resultat és idèntic al d'una execució sense interrupcions. Els anys
+    anteriors es recuperen dels checkpoints any_1..any_n, i els nous anys
+    també hi desen el seu checkpoint.
+    """
+    estat = carregar_checkpoint(checkpoint_dir, any_checkpoint)
+    params = estat['params']
+
+    if params['seed'] is not None:
+        rng = np.random.RandomState()
+    else:
+        rng = np.random
+    rng.set_state(estat['rng_state'])
+
+    historial = [carregar_checkpoint(checkpoint_dir, anyo)['resultat']
+                 for anyo in range(1, estat['any'])]
+    historial.append(estat['resultat'])
+
+    df_hist = _simular_anys(estat['poblacio'], rng, estat['pid'], captures_per_year_list,
+                            estat['any'] + 1, historial, params,
+                            desar_resultats_anuals, checkpoint_dir, perfil)
+    _desar_historial_csv(df_hist, output_csv)
     return df_hist
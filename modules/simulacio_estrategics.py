@@ -2,8 +2,9 @@ import pandas as pd
 import numpy as np
 import os
 import matplotlib.pyplot as plt
-from sorteig import assignar_isards_sorteig_csv
+from sorteig import assignar_isards_sorteig
 from generador import generar_dades_inicials
+from carrega import llegir_inscrits
 
 
 def simular_6_anys_tracking(
@@ -13,7 +14,8 @@ def simular_6_anys_tracking(
     min_colla_size: int = 8,
     max_colla_size: int = 20,
     tracked_count: int = 10,
-    output_folder_data: str = 'data'
+    output_folder_data: str = 'data',
+    desar_resultats_anuals: bool = False
 ) -> (pd.DataFrame, list):
     """
     Simula 6 anys amb captures i tracking segons si han guanyat l'any anterior.
@@ -21,6 +23,9 @@ def simular_6_anys_tracking(
     en grups de mida entre min_colla_size i max_colla_size, utilitzant només
     guanyadors de l'any anterior.
 
+    El sorteig de cada any es fa en memòria; resultats_any_{n}.csv només es
+    desa a output_folder_data si `desar_resultats_anuals` és True.
+
     Retorna el dataframe complet i els tracked_ids utilitzats.
     """
 
@@ -29,7 +34,9 @@ def simular_6_anys_tracking(
 
     rng = np.random.RandomState(seed) if seed is not None else np.random
     csv_path = os.path.join(output_folder_data, initial_filename)
-    df = pd.read_csv(csv_path, sep=';')
+    df = llegir_inscrits(csv_path, snapshot=True)
+    # Cada any es creen colles estratègiques noves: text, no categories
+    df['Colla_ID'] = df['Colla_ID'].astype(object)
     historial = []
     tracked_ids = []
 
@@ -39,11 +46,12 @@ def simular_6_anys_tracking(
         if anyo > 1 and tracked_ids:
             # Obtenir IDs dels guanyadors de l'any anterior
             df_any_anterior = historial[-1]
-            winners_last = df_any_anterior.loc[df_any_anterior['adjudicats'] > 0, 'ID'].tolist()
+            winners_last = df_any_anterior.loc[df_any_anterior['adjudicats'] > 0, 'ID'].to_numpy()
 
-            # Tracked winners
-            tracked_won_last = [i for i in winners_last if i in tracked_ids]
-            others = [i for i in winners_last if i not in tracked_won_last]
+            # Tracked winners (ordre original), la resta són "others"
+            es_tracked = np.isin(winners_last, tracked_ids)
+            tracked_won_last = winners_last[es_tracked]
+            others = winners_last[~es_tracked]
 
             colla_groups = []
             # 1) Particiona tracked_won_last en trossos de max_colla_size
@@ -53,30 +61,33 @@ def simular_6_anys_tracking(
 
             # 2) Per cada grup, si < min_colla_size, top-up amb "others"
             for idx, group in enumerate(colla_groups):
-                if len(group) < min_colla_size and others:
+                if len(group) < min_colla_size and len(others):
                     need = min_colla_size - len(group)
-                    pick = rng.choice(others, size=min(need, len(others)), replace=False).tolist()
-                    group.extend(pick)
+                    pick = rng.choice(others, size=min(need, len(others)), replace=False)
+                    colla_groups[idx] = np.concatenate([group, pick])
                     # treure els seleccionats d'others
-                    others = [o for o in others if o not in pick]
-
-            # 3) Ara assignem cada grup com una colla separada
-            for j, group in enumerate(colla_groups, start=1):
-                colla_name = f"TrackedColla_{anyo}_{j}"
-                df.loc[df['ID'].isin(group), ['Modalitat','Colla_ID']] = ['A', colla_name]
-                print(f"🔗 Creada colla '{colla_name}' amb {len(group)} caçadors")
-
-        # Estat intermitjà per al sorteig
-        temp_in = os.path.join(output_folder_data, f"temp_any_{anyo}.csv")
-        df.to_csv(temp_in, sep=';', index=False)
+                    others = others[~np.isin(others, pick)]
+
+            # 3) Ara assignem cada grup com una colla separada, amb una sola actualització
+            if colla_groups:
+                noms = [f"TrackedColla_{anyo}_{j}" for j in range(1, len(colla_groups) + 1)]
+                colla_per_id = pd.Series(
+                    np.repeat(np.array(noms, dtype=object), [len(g) for g in colla_groups]),
+                    index=np.concatenate(colla_groups)
+                )
+                files = df['ID'].isin(colla_per_id.index)
+                df.loc[files, 'Modalitat'] = 'A'
+                df.loc[files, 'Colla_ID'] = df.loc[files, 'ID'].map(colla_per_id)
+                print(f"🔗 Creades {len(noms)} colles estratègiques amb {len(colla_per_id)} caçadors")
 
         # Assignació de captures
-        df_out = assignar_isards_sorteig_csv(
-            file_csv=temp_in,
+        df_out = assignar_isards_sorteig(
+            df,
             total_captures=captures,
-            output_csv=os.path.join(output_folder_data, f"resultats_any_{anyo}.csv"),
             seed=(seed + anyo * 100) if seed is not None else anyo * 100
         )
+        if desar_resultats_anuals:
+            df_out.to_csv(os.path.join(output_folder_data, f"resultats_any_{anyo}.csv"), index=False)
         df_out['any'] = anyo
 
         # Primer any: triar tracked_ids inicials
@@ -94,7 +105,6 @@ def simular_6_anys_tracking(
             df_out[['ID','Modalitat','Colla_ID','nova_prioritat','nou_anys_sense_captura','adjudicats']]
             .rename(columns={'nova_prioritat':'Prioritat','nou_anys_sense_captura':'anys_sense_captura'})
         )
-        os.remove(temp_in)
 
     # Concatena i desa l'historial
     df_hist = pd.concat(historial, ignore_index=True)
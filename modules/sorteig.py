@@ -1,8 +1,17 @@
 import pandas as pd
 import numpy as np
 import math
+import heapq
+from fractions import Fraction
 from typing import Optional
 
+try:
+    from modules.carrega import llegir_inscrits
+    from modules.perfil import PERFIL_NUL
+except ImportError:  # executat des de modules/ (simulacio_estrategics.py)
+    from carrega import llegir_inscrits
+    from perfil import PERFIL_NUL
+
 """
 Assigna captures d'isard segons el règim de sorteig i exporta un CSV amb el camp 'adjudicats'
 i 'nova_prioritat'.
@@ -17,10 +26,13 @@ Ruta al fitxer CSV d'entrada amb full de dades 'inscrits'. Ha de contenir les co
 - Colla_ID (identificador de la colla; NaN o None per a individuals)
 total_captures : int
 Nombre total d'isards a distribuir.
-output_csv : str
-Nom del fitxer CSV de sortida (per defecte "resultats.csv").
+output_csv : str, opcional
+Nom del fitxer CSV de sortida (per defecte "resultats.csv"; None per no desar-lo).
 seed : int, opcional
 Llavors per al generador aleatori (per reproducibilitat).
+perfil : modules.perfil.Perfil, opcional
+Registre de temps, memòria i comptadors per fase (lectura, repartiment A/B,
+sobrants de colles, assignació, historial). Sense perfil no es mesura res.
 
 Retorna
 -------
@@ -31,117 +43,428 @@ DataFrame ampliat amb les columnes:
 """
 
 
-def assignar_isards_sorteig_csv(
-    file_csv: str,
+def repartir_sobrants_colles(
+    caçadors: np.ndarray,
+    assignats: np.ndarray,
+    sobrants: int,
+    rng,
+    perfil=None
+) -> np.ndarray:
+    """
+    Reparteix les captures sobrants d'una en una a la colla amb el rati
+    assignats/caçadors més baix, amb una cua de prioritat.
+
+    Els ratis es comparen de forma exacta (fraccions d'enters, és a dir,
+    multiplicació creuada) en lloc d'un `np.isclose`. Les colles empatades al
+    rati mínim formen un nivell: es trien a l'atzar, sense reemplaçament i en
+    l'ordre original, amb les mateixes crides al generador que el
+    `DataFrame.sample` anterior, de manera que el resultat és idèntic.
+
+    Retorna
+    -------
+    np.ndarray
+        Nou nombre de captures assignades a cada colla.
+    """
+    perfil = perfil or PERFIL_NUL
+    caçadors = np.asarray(caçadors, dtype=np.int64)
+    assignats = np.array(assignats, dtype=np.int64)
+
+    cua = [(Fraction(int(a), int(n)), i) for i, (a, n) in enumerate(zip(assignats, caçadors))]
+    heapq.heapify(cua)
+
+    while sobrants > 0 and cua:
+        # Nivell: totes les colles empatades al rati mínim
+        rati_min = cua[0][0]
+        nivell = []
+        while cua and cua[0][0] == rati_min:
+            nivell.append(heapq.heappop(cua)[1])
+        nivell.sort()
+        perfil.comptar('nivells')
+
+        while nivell and sobrants > 0:
+            i = nivell.pop(rng.choice(len(nivell), size=1, replace=False)[0])
+            assignats[i] += 1
+            sobrants -= 1
+            perfil.comptar('captures_repartides')
+            heapq.heappush(cua, (Fraction(int(assignats[i]), int(caçadors[i])), i))
+
+    return assignats
+
+
+def planificar_sobrants_colles(
+    caçadors: np.ndarray,
+    assignats: np.ndarray,
+    sobrants: int
+):
+    """
+    Part determinista de repartir_sobrants_colles. Els nivells que es
+    reparteixen sencers donen el mateix resultat sigui quin sigui l'ordre del
+    sorteig; només importa quines colles de l'últim nivell reben les captures
+    quan n'hi ha menys que colles.
+
+    Retorna
+    -------
+    (np.ndarray, list, list, int)
+        Captures segures de cada colla, mida de cada nivell repartit sencer
+        (en ordre), colles de l'últim nivell (ordenades) i captures que s'hi
+        sortegen (0 si no n'hi ha).
+    """
+    caçadors = np.asarray(caçadors, dtype=np.int64)
+    assignats = np.array(assignats, dtype=np.int64)
+    nivells_sencers = []
+
+    cua = [(Fraction(int(a), int(n)), i) for i, (a, n) in enumerate(zip(assignats, caçadors))]
+    heapq.heapify(cua)
+
+    while sobrants > 0 and cua:
+        rati_min = cua[0][0]
+        nivell = []
+        while cua and cua[0][0] == rati_min:
+            nivell.append(heapq.heappop(cua)[1])
+        nivell.sort()
+
+        if len(nivell) > sobrants:
+            return assignats, nivells_sencers, nivell, sobrants
+        for i in nivell:
+            assignats[i] += 1
+            heapq.heappush(cua, (Fraction(int(assignats[i]), int(caçadors[i])), i))
+        nivells_sencers.append(len(nivell))
+        sobrants -= len(nivell)
+
+    return assignats, nivells_sencers, [], 0
+
+
+def _sortejar_ultim_nivell(nivells_sencers: list, ultim_nivell: list, sobrants: int, rng) -> list:
+    """
+    Repeteix el consum del generador de repartir_sobrants_colles (una crida
+    per captura, sobre les colles que queden al nivell) i retorna les colles
+    de l'últim nivell que reben una captura.
+
+    `rng.choice(n, size=1, replace=False)` és `rng.permutation(n)[:1]`, i el
+    que consumeix una permutació només depèn de n: als nivells sencers,
+    on el resultat no importa, n'hi ha prou a barrejar un buffer reutilitzat.
+    """
+    buffer = np.empty(max(nivells_sencers, default=0), dtype=np.int64)
+    for mida in nivells_sencers:
+        for n in range(mida, 0, -1):
+            rng.shuffle(buffer[:n])
+    nivell = list(ultim_nivell)
+    return [nivell.pop(rng.permutation(len(nivell))[0]) for _ in range(sobrants)]
+
+
+def _ordenar_dins_segments(segment: np.ndarray, clau: np.ndarray) -> np.ndarray:
+    """
+    Ordre que classifica per `segment` (no decreixent) i, dins de cada segment,
+    per `clau` (nombres de random_sample, múltiples exactes de 2**-53), amb els
+    empats en l'ordre original: el mateix que np.lexsort((clau, segment)).
+
+    Segment i clau es combinen en un sol enter de 64 bits (molt més ràpid
+    d'ordenar que un lexsort); si no hi caben els 53 bits de la clau, es
+    trunca, i els empats que en resulten es tornen a ordenar exactament.
+    """
+    bits_segment = max(1, int(segment[-1]).bit_length()) if len(segment) else 1
+    descart = max(0, 53 - (64 - bits_segment))
+    enter = (clau * 2.0**53).astype(np.uint64) >> np.uint64(descart)
+    compost = (segment.astype(np.uint64) << np.uint64(64 - bits_segment)) | enter
+    ordre = np.argsort(compost)
+
+    ordenat = compost[ordre]
+    empat = np.flatnonzero(ordenat[1:] == ordenat[:-1])
+    if len(empat):
+        posicions = np.unique(np.r_[empat, empat + 1])
+        implicats = ordre[posicions]
+        ordre[posicions] = implicats[np.lexsort((implicats, clau[implicats], ordenat[posicions]))]
+    return ordre
+
+
+def assignar_places_per_grup(
+    codis: np.ndarray,
+    places: np.ndarray,
+    prioritat: np.ndarray,
+    anys_sense_captura: np.ndarray,
+    rng
+) -> np.ndarray:
+    """
+    Reparteix les places de cada grup entre els seus membres en una sola passada.
+
+    Cada caçador es classifica un sol cop dins del seu grup per Prioritat (asc),
+    anys_sense_captura (desc) i una clau aleatòria (asc). Els nombres aleatoris
+    es consumeixen en el mateix ordre que el bucle per grups original (una clau
+    per membre i passada, grup rere grup), de manera que amb la mateixa llavor
+    el resultat és idèntic. Si un grup té més places que membres, tothom rep
+    les passades completes i només l'última passada depèn del rang.
+
+    Paràmetres
+    ----------
+    codis : np.ndarray
+        Codi de grup 0..G-1 de cada caçador (-1 si no participa).
+    places : np.ndarray
+        Places a repartir a cada grup (longitud G).
+    prioritat, anys_sense_captura : np.ndarray
+        Claus d'ordenació de cada caçador.
+    rng : np.random.RandomState o mòdul np.random
+
+    Retorna
+    -------
+    np.ndarray
+        Adjudicacions per caçador.
+    """
+    codis = np.asarray(codis, dtype=np.int64)
+    places = np.asarray(places, dtype=np.int64)
+    adjudicats = np.zeros(len(codis), dtype=np.int64)
+
+    idx = np.flatnonzero(codis >= 0)
+    grup = codis[idx]
+    mides = np.bincount(grup, minlength=len(places))
+    completes = places // np.maximum(mides, 1)
+    resta = places - completes * mides
+    passades = completes + (resta > 0)
+
+    # Claus aleatòries de l'última passada de cada grup
+    consum = passades * mides
+    claus = rng.random(size=int(consum.sum()))
+    inici_grup = np.cumsum(mides) - mides
+    inici_ultima = np.cumsum(consum) - mides
+
+    ordre = np.argsort(grup, kind='stable')
+    posicio = np.empty(len(grup), dtype=np.int64)
+    posicio[ordre] = np.arange(len(grup)) - inici_grup[grup[ordre]]
+
+    clau = np.zeros(len(grup))
+    sorteja = passades[grup] > 0
+    clau[sorteja] = claus[inici_ultima[grup[sorteja]] + posicio[sorteja]]
+
+    # Rang de cada caçador dins del seu grup
+    ordre = np.lexsort((clau, -anys_sense_captura[idx], prioritat[idx], grup))
+    rang = np.empty(len(grup), dtype=np.int64)
+    rang[ordre] = np.arange(len(grup)) - inici_grup[grup[ordre]]
+
+    adjudicats[idx] = completes[grup] + (rang < resta[grup])
+    return adjudicats
+
+
+def assignar_isards_sorteig(
+    df: pd.DataFrame,
     total_captures: int,
-    output_csv: str = "resultats.csv",
-    seed: Optional[int] = None
+    seed: Optional[int] = None,
+    perfil=None
 ) -> pd.DataFrame:
+    """
+    Versió en memòria del sorteig: rep el DataFrame d'inscrits i en retorna una
+    còpia amb 'adjudicats', 'nova_prioritat' i 'nou_anys_sense_captura', sense
+    llegir ni escriure cap fitxer.
+
+    Si es dona un `perfil` (modules.perfil.Perfil), s'hi registren el temps,
+    la memòria i els comptadors de cada fase del sorteig.
+    """
+    perfil = perfil or PERFIL_NUL
     rng = np.random.RandomState(seed) if seed is not None else np.random
-    df = pd.read_csv(file_csv, sep=';')
+    df = df.copy()
 
     required_cols = {'ID', 'Modalitat', 'Prioritat', 'Colla_ID', 'anys_sense_captura'}
     if not required_cols.issubset(df.columns):
         raise ValueError(f"Falten columnes obligatòries: {required_cols - set(df.columns)}")
 
-    df['adjudicats'] = 0
-    df_colla = df[df['Modalitat'] == 'A'].copy()
-    df_indiv = df[df['Modalitat'] == 'B'].copy()
-    n_colla_applicants = len(df_colla)
-    n_indiv_applicants = len(df_indiv)
-
-    total_applicants = n_colla_applicants + n_indiv_applicants
-    ratio = math.ceil(total_applicants / total_captures)
-
-    # --- Proportional distribution of captures
-    n_indiv = round(total_captures * n_indiv_applicants / total_applicants)
-    n_colla = total_captures - n_indiv
-
-    # --- Distribution per colla
-    colles_df = df_colla.groupby('Colla_ID').size().reset_index(name='caçadors')
-    colles_df['floor'] = (colles_df['caçadors'] // ratio).astype(int)
-    colles_df['assignats'] = colles_df['floor']
-
-    # --- Calculate remaining captures for colles (proportional share of leftovers)
-    base_assigned = colles_df['assignats'].sum()
-    proportional_remainder = n_colla - base_assigned
-    for _ in range(proportional_remainder):
-        colles_df['rati'] = colles_df['assignats'] / colles_df['caçadors']
-        min_rati = colles_df['rati'].min()
-        candidates = colles_df[np.isclose(colles_df['rati'], min_rati, atol=1e-6)]
-        selected = candidates.sample(n=1, random_state=rng)
-        colla_id = selected['Colla_ID'].values[0]
-        colles_df.loc[colles_df['Colla_ID'] == colla_id, 'assignats'] += 1
-
-    # --- Assign inside colles
-    for _, row in colles_df.iterrows():
-        cid = row['Colla_ID']
-        n_assign = int(row['assignats'])
-
-        while n_assign > 0:
-            # Troba el mínim d’adjudicacions dins la colla
-            adjudicacions_actuals = df[
-                (df['Modalitat'] == 'A') & (df['Colla_ID'] == cid)
-            ]['adjudicats']
-            min_adjud = adjudicacions_actuals.min()
-
-            # Grup amb menys adjudicacions
-            group = df[
-                (df['Modalitat'] == 'A') &
-                (df['Colla_ID'] == cid) &
-                (df['adjudicats'] == min_adjud)
-            ].copy()
-
-            if group.empty:
-                break
-
-            group['rand'] = rng.random(size=len(group))
-            sorted_group = group.sort_values(
-                by=['Prioritat', 'anys_sense_captura', 'rand'],
-                ascending=[True, False, True]
-            )
-
-            n_to_assign = min(n_assign, len(sorted_group))
-            assign_indices = sorted_group.index[:n_to_assign]
-            df.loc[assign_indices, 'adjudicats'] += 1
-            n_assign -= n_to_assign
-
-
-    # --- Assign in modality B (individual)
-    if n_indiv > 0:
-        remaining_indiv = n_indiv
-
-        while remaining_indiv > 0:
-            # Troba el mínim d’adjudicacions actuals entre els individuals
-            min_adjud = df[df['Modalitat'] == 'B']['adjudicats'].min()
-
-            group = df[
-                (df['Modalitat'] == 'B') &
-                (df['adjudicats'] == min_adjud)
-            ].copy()
-
-            if group.empty:
-                break
-
-            group['rand'] = rng.random(size=len(group))
-            sorted_group = group.sort_values(
-                by=['Prioritat', 'anys_sense_captura', 'rand'],
-                ascending=[True, False, True]
-            )
-
-            n_to_assign = min(remaining_indiv, len(sorted_group))
-            assign_indices = sorted_group.index[:n_to_assign]
-            df.loc[assign_indices, 'adjudicats'] += 1
-            remaining_indiv -= n_to_assign
-
-
-    # --- Compute new priority and history
-    df['nova_prioritat'] = df['adjudicats'].apply(lambda x: 4 if x == 1 else 2)
-    df['nou_anys_sense_captura'] = df.apply(
-        lambda row: 0 if row['adjudicats'] == 1 else row['anys_sense_captura'] + 1,
-        axis=1
-    )
-
-    df.drop(columns=['rand'], errors='ignore').to_csv(output_csv, index=False)
+    with perfil.fase('repartiment_AB'):
+        df['adjudicats'] = 0
+        df_colla = df[df['Modalitat'] == 'A'].copy()
+        df_indiv = df[df['Modalitat'] == 'B'].copy()
+        n_colla_applicants = len(df_colla)
+        n_indiv_applicants = len(df_indiv)
+
+        total_applicants = n_colla_applicants + n_indiv_applicants
+        ratio = math.ceil(total_applicants / total_captures)
+
+        # --- Proportional distribution of captures
+        n_indiv = round(total_captures * n_indiv_applicants / total_applicants)
+        n_colla = total_captures - n_indiv
+
+        # --- Distribution per colla
+        colles_df = df_colla.groupby('Colla_ID', observed=True).size().reset_index(name='caçadors')
+        colles_df['floor'] = (colles_df['caçadors'] // ratio).astype(int)
+        colles_df['assignats'] = colles_df['floor']
+        perfil.comptar('caçadors', total_applicants)
+        perfil.comptar('colles', len(colles_df))
+
+    with perfil.fase('sobrants_colles'):
+        # --- Calculate remaining captures for colles (proportional share of leftovers)
+        base_assigned = colles_df['assignats'].sum()
+        proportional_remainder = n_colla - base_assigned
+        colles_df['assignats'] = repartir_sobrants_colles(
+            colles_df['caçadors'].to_numpy(),
+            colles_df['assignats'].to_numpy(),
+            proportional_remainder,
+            rng,
+            perfil
+        )
+
+    with perfil.fase('assignacio_grups'):
+        # --- Assign inside colles (grup = colla) i en modalitat B (últim grup)
+        # Les dues modalitats es reparteixen en la mateixa passada
+        codi_colla = pd.Index(colles_df['Colla_ID']).get_indexer(df['Colla_ID'])
+        codis = np.where(df['Modalitat'] == 'A', codi_colla, -1)
+        codis[(df['Modalitat'] == 'B').to_numpy()] = len(colles_df)
+        places = np.append(colles_df['assignats'].to_numpy(), max(n_indiv, 0))
+
+        df['adjudicats'] = assignar_places_per_grup(
+            codis,
+            places,
+            df['Prioritat'].to_numpy(dtype=float),
+            df['anys_sense_captura'].to_numpy(dtype=float),
+            rng
+        )
+        perfil.comptar('places_colles', places[:-1].sum())
+        perfil.comptar('places_individuals', places[-1])
+
+    with perfil.fase('historial'):
+        # --- Compute new priority and history
+        adjudicats = df['adjudicats'].to_numpy()
+        df['nova_prioritat'] = np.where(adjudicats == 1, 4, 2)
+        df['nou_anys_sense_captura'] = np.where(
+            adjudicats == 1, 0, df['anys_sense_captura'] + 1
+        )
+
     return df
 
+
+def assignar_isards_sorteig_csv(
+    file_csv: str,
+    total_captures: int,
+    output_csv: Optional[str] = "resultats.csv",
+    seed: Optional[int] = None,
+    perfil=None
+) -> pd.DataFrame:
+    perfil = perfil or PERFIL_NUL
+    with perfil.fase('lectura_csv'):
+        df = llegir_inscrits(file_csv)
+    with perfil.fase('sorteig'):
+        df = assignar_isards_sorteig(df, total_captures, seed, perfil)
+    if output_csv is not None:
+        with perfil.fase('escriptura_csv'):
+            df.to_csv(output_csv, index=False)
+    return df
+
+
+# Elements (rèpliques x caçadors) processats alhora al sorteig per rèpliques
+MIDA_BLOC_REPLIQUES = 2_000_000
+
+
+def assignar_isards_sorteig_replicas(
+    df: pd.DataFrame,
+    total_captures: int,
+    seeds,
+    mida_bloc: int = MIDA_BLOC_REPLIQUES,
+    perfil=None
+) -> np.ndarray:
+    """
+    Sorteig d'un any per a moltes llavors alhora. Retorna una matriu
+    (llavors x caçadors, en l'ordre de les files de `df`) amb les
+    adjudicacions; la fila r és idèntica a la columna 'adjudicats' de
+    assignar_isards_sorteig(df, total_captures, seed=seeds[r]).
+
+    Tot el que no depèn de la llavor es calcula un sol cop: repartiment A/B,
+    nivells de sobrants entre colles (planificar_sobrants_colles), grups i
+    franges (Prioritat, anys_sense_captura) de cada caçador. Per llavor només
+    es repeteixen les crides al generador (sorteig de l'últim nivell i claus
+    aleatòries); la resta es fa amb operacions sobre matrius per blocs de
+    rèpliques (`mida_bloc` elements), amb una sola ordenació per bloc que
+    només inclou els caçadors de la franja on cau el tall de cada grup.
+
+    La matriu és d'enters de 32 bits per limitar la memòria amb moltes rèpliques.
+    """
+    perfil = perfil or PERFIL_NUL
+    seeds = [int(s) for s in seeds]
+
+    required_cols = {'ID', 'Modalitat', 'Prioritat', 'Colla_ID', 'anys_sense_captura'}
+    if not required_cols.issubset(df.columns):
+        raise ValueError(f"Falten columnes obligatòries: {required_cols - set(df.columns)}")
+
+    with perfil.fase('preparacio'):
+        es_A = (df['Modalitat'] == 'A').to_numpy()
+        es_B = (df['Modalitat'] == 'B').to_numpy()
+        total_applicants = int(es_A.sum() + es_B.sum())
+        ratio = math.ceil(total_applicants / total_captures)
+        n_indiv = round(total_captures * int(es_B.sum()) / total_applicants)
+        n_colla = total_captures - n_indiv
+
+        colles_df = df[es_A].groupby('Colla_ID', observed=True).size().reset_index(name='caçadors')
+        floor = (colles_df['caçadors'] // ratio).astype(int).to_numpy()
+        segures, nivells_sencers, ultim_nivell, sobrants = planificar_sobrants_colles(
+            colles_df['caçadors'].to_numpy(), floor, n_colla - floor.sum()
+        )
+
+        codi_colla = pd.Index(colles_df['Colla_ID']).get_indexer(df['Colla_ID'])
+        codis = np.where(es_A, codi_colla, -1)
+        codis[es_B] = len(colles_df)
+        places_base = np.append(segures, max(n_indiv, 0))
+
+        # Grup, posició dins del grup (ordre original) i franja de cada caçador
+        idx = np.flatnonzero(codis >= 0)
+        grup = codis[idx]
+        mides = np.bincount(grup, minlength=len(places_base))
+        inici_grup = np.cumsum(mides) - mides
+        ordre = np.argsort(grup, kind='stable')
+        posicio = np.empty(len(grup), dtype=np.int64)
+        posicio[ordre] = np.arange(len(grup)) - inici_grup[grup[ordre]]
+
+        # Els caçadors es reordenen per grup, Prioritat, -anys_sense_captura i
+        # ordre original: cada franja queda contigua i en l'ordre de desempat
+        prioritat = df['Prioritat'].to_numpy(dtype=float)[idx]
+        anys = df['anys_sense_captura'].to_numpy(dtype=float)[idx]
+        ordre = np.lexsort((-anys, prioritat, grup))
+        columna, grup, posicio = idx[ordre], grup[ordre], posicio[ordre]
+        prioritat, anys = prioritat[ordre], anys[ordre]
+        nova = np.r_[True, (grup[1:] != grup[:-1]) | (prioritat[1:] != prioritat[:-1])
+                     | (anys[1:] != anys[:-1])]
+        inici_franja = np.flatnonzero(nova)
+        n_franges = len(inici_franja)
+        franja = np.cumsum(nova) - 1
+        davant = inici_franja[franja] - inici_grup[grup]
+        mida_franja = np.diff(np.r_[inici_franja, len(grup)])[franja]
+        perfil.comptar('caçadors', total_applicants)
+        perfil.comptar('replicas', len(seeds))
+
+    adjudicats = np.zeros((len(seeds), len(df)), dtype=np.int32)
+    bloc = max(1, mida_bloc // max(len(idx), 1))
+    rng = np.random.RandomState()
+
+    for inici in range(0, len(seeds), bloc):
+        llavors = seeds[inici:inici + bloc]
+        places = np.tile(places_base, (len(llavors), 1))
+        claus = []
+
+        # --- Per llavor: sorteig de l'últim nivell i claus aleatòries
+        with perfil.fase('claus'):
+            for r, seed in enumerate(llavors):
+                rng.seed(seed)  # el mateix estat que RandomState(seed), sense crear-ne un de nou
+                places[r, _sortejar_ultim_nivell(nivells_sencers, ultim_nivell, sobrants, rng)] += 1
+                completes = places[r] // np.maximum(mides, 1)
+                passades = completes + (places[r] - completes * mides > 0)
+                claus.append(rng.random(size=int((passades * mides).sum())))
+
+        with perfil.fase('assignacio_grups'):
+            completes = places // np.maximum(mides, 1)
+            resta = places - completes * mides
+            consum = (completes + (resta > 0)) * mides
+            base = np.cumsum([0] + [len(c) for c in claus[:-1]])
+            inici_ultima = np.cumsum(consum, axis=1) - mides + base[:, None]
+            claus = np.concatenate(claus)
+
+            resta_c = resta[:, grup]
+            sencera = davant + mida_franja <= resta_c
+            tall = (davant < resta_c) & ~sencera
+
+            # Rang dins de la franja del tall (segments contigus en l'ordre de np.nonzero)
+            files, cols = np.nonzero(tall)
+            clau = claus[inici_ultima[files, grup[cols]] + posicio[cols]]
+            segment = files * n_franges + franja[cols]
+            nou = np.r_[True, segment[1:] != segment[:-1]] if len(segment) else np.zeros(0, dtype=bool)
+            segment = np.cumsum(nou) - 1
+            inici_seg = np.flatnonzero(nou)
+            rang = np.empty(len(segment), dtype=np.int64)
+            rang[_ordenar_dins_segments(segment, clau)] = np.arange(len(segment)) - inici_seg[segment]
+            sencera[files, cols] = rang < resta_c[files, cols] - davant[cols]
+
+            adjudicats[inici:inici + len(llavors), columna] = completes[:, grup] + sencera
+
+    return adjudicats
@@ -0,0 +1,34 @@
+import os
+
+from modules import cache
+
+
+def test_desar_dues_vegades_la_mateixa_clau(tmp_path):
+    font = tmp_path / 'resultat.csv'
+    font.write_text('a\n1\n')
+    arrel = str(tmp_path / 'cache')
+
+    entrada = cache.desar(arrel, 'clau', {'resultat.csv': str(font)})
+    # Un segon procés que acaba després amb la mateixa clau no falla
+    font.write_text('a\n2\n')
+    assert cache.desar(arrel, 'clau', {'resultat.csv': str(font)}) == entrada
+
+    assert sorted(os.listdir(arrel)) == ['clau']
+    assert (tmp_path / 'cache' / 'clau' / 'resultat.csv').read_text() == 'a\n1\n'
+
+
+def test_desar_quan_un_altre_proces_guanya_el_renom(tmp_path, monkeypatch):
+    font = tmp_path / 'resultat.csv'
+    font.write_text('a\n1\n')
+    arrel = str(tmp_path / 'cache')
+    replace = os.replace
+
+    def replace_perdut(origen, desti):
+        # L'altre procés desa l'entrada just abans del nostre renom
+        os.makedirs(os.path.join(desti, 'x'))
+        replace(origen, desti)
+
+    monkeypatch.setattr(cache.os, 'replace', replace_perdut)
+    entrada = cache.desar(arrel, 'clau', {'resultat.csv': str(font)})
+    assert os.path.isdir(entrada)
+    assert sorted(os.listdir(arrel)) == ['clau']
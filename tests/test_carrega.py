@@ -0,0 +1,55 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from modules.carrega import llegir_csv, llegir_inscrits, ruta_snapshot, ESQUEMA_SOL_LICITANTS
+
+
+def test_comptador_buit_fora_de_l_esquema(tmp_path):
+    # Un comptador amb cel·les buides (fora de l'esquema) no ha de fer fallar la lectura
+    path = tmp_path / 'sol_licitants.csv'
+    path.write_text(
+        "ID;Modalitat;Prioritat;Colla_ID;anys_sense_captura;Resultat_sorteigs_mateixa_sps\n"
+        "1;A;3;C1;0;\n"
+        "2;B;2;;1;2\n"
+        "3;A;3;C1;0;\n",
+        encoding='utf-8'
+    )
+    df = llegir_csv(str(path), ESQUEMA_SOL_LICITANTS)
+
+    assert isinstance(df['Modalitat'].dtype, pd.CategoricalDtype)
+    assert isinstance(df['Colla_ID'].dtype, pd.CategoricalDtype)
+    assert df['Resultat_sorteigs_mateixa_sps'].isna().tolist() == [True, False, True]
+
+
+def test_inscrits_amb_tipus_de_l_esquema(tmp_path):
+    path = tmp_path / 'sorteig.csv'
+    path.write_text(
+        "ID;Modalitat;Prioritat;Colla_ID;anys_sense_captura\n"
+        "1;A;3;C1;0\n"
+        "2;B;2;;1\n",
+        encoding='utf-8'
+    )
+    df = llegir_inscrits(str(path))
+
+    assert df['ID'].dtype == 'int64'
+    assert df['Prioritat'].dtype == 'int64'
+    assert list(df['Modalitat'].cat.categories) == ['A', 'B']
+
+
+def test_snapshot_desat_alhora_per_diversos_processos(tmp_path):
+    path = tmp_path / 'sorteig.csv'
+    path.write_text(
+        "ID;Modalitat;Prioritat;Colla_ID;anys_sense_captura\n"
+        + "".join(f"{i};A;3;C{i % 7};{i % 3}\n" for i in range(1, 2001)),
+        encoding='utf-8'
+    )
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        resultats = list(executor.map(llegir_inscrits, [str(path)] * 8, [True] * 8))
+
+    for df in resultats:
+        pd.testing.assert_frame_equal(df, resultats[0])
+    # El snapshot és sencer i no queda cap fitxer temporal
+    pd.testing.assert_frame_equal(llegir_inscrits(str(path), snapshot=True), resultats[0])
+    assert sorted(os.listdir(tmp_path)) == ['sorteig.csv', os.path.basename(ruta_snapshot(str(path)))]
@@ -0,0 +1,25 @@
+import pandas as pd
+
+from modules.equitat import metriques_caçadors
+
+
+def test_colles_petites_son_les_de_mida_minima_de_cada_any():
+    # Any 1: colles de 3, 5 i 12 membres; any 2: colles de 5 i 12 (la de 3 ja no hi és)
+    mides = {1: {'c3': 3, 'c5': 5, 'c12': 12}, 2: {'c5': 5, 'c12': 12}}
+    files, ids = [], {}
+    for any_, colles in mides.items():
+        for colla, mida in colles.items():
+            for k in range(mida):
+                id_ = ids.setdefault((colla, k), len(ids) + 1)
+                files.append(dict(ID=id_, any=any_, Modalitat='A', Colla_ID=colla, adjudicats=0))
+    files.append(dict(ID=999, any=1, Modalitat='B', Colla_ID=None, adjudicats=1))
+    caçadors = metriques_caçadors(pd.DataFrame(files)).set_index('ID')
+
+    classe = {colla: caçadors.loc[ids[(colla, 0)], 'classe'] for colla in ('c3', 'c5', 'c12')}
+    assert classe == {'c3': 'A_petita', 'c5': 'A_mitjana', 'c12': 'A_gran'}
+    assert caçadors.loc[999, 'classe'] == 'B'
+
+    # Els nous de la colla de 5 a l'any 2 ja són de la colla més petita
+    files.append(dict(ID=1000, any=2, Modalitat='A', Colla_ID='c5', adjudicats=0))
+    caçadors = metriques_caçadors(pd.DataFrame(files)).set_index('ID')
+    assert caçadors.loc[1000, 'classe'] == 'A_petita'
@@ -0,0 +1,36 @@
+from modules.escombrat import expandir_graella, partir_grup, clau_poblacio
+
+
+def _tasques(variants, **kwargs):
+    grups = {}
+    for v in variants:
+        grups.setdefault(clau_poblacio(v), []).append(v)
+    return [t for g in grups.values() for t in partir_grup(g, **kwargs)]
+
+
+def test_variants_que_divergeixen_al_primer_any_van_a_tasques_separades():
+    variants = expandir_graella({
+        'colla': {'min8': [8, 20]},
+        'captures': {f'c{n}': [n] * 6 for n in (60, 90, 120, 150)},
+        'rotacio': {'sense': [[0, 0], [0, 0]], 'aleatoria': [[1, 10], [1, 10]]},
+        'seeds': [42],
+    })
+    tasques = _tasques(variants)
+    assert len(tasques) == len(variants)
+
+
+def test_variants_que_divergeixen_tard_comparteixen_tasca():
+    variants = expandir_graella({
+        'colla': {'min8': [8, 20]},
+        'captures': {'fixes': [150] * 6, 'final': [150] * 4 + [60, 60], 'mig': [150] * 3 + [1] * 3},
+        'rotacio': {'sense': [[0, 0], [0, 0]]},
+        'seeds': [1, 2],
+    })
+    tasques = _tasques(variants)
+    assert sorted(len(t) for t in tasques) == [3, 3]
+    assert all(len({v['seed'] for v in t}) == 1 for t in tasques)
+
+    # Amb un màxim de variants per tasca, el grup es talla
+    assert sorted(len(t) for t in _tasques(variants, max_variants=2)) == [1, 1, 2, 2]
+    # Si cal compartir més anys dels que tenen en comú, es parteixen on divergeixen
+    assert sorted(len(t) for t in _tasques(variants, anys_minims=4)) == [1, 1, 2, 2]
@@ -0,0 +1,41 @@
+import contextlib
+import io
+
+import pytest
+
+from modules.carrega import llegir_inscrits
+from modules.historial import desar_historial, llegir_historial, particions_historial
+from modules.simulacio import simular_6_anys_variable
+
+
+@pytest.fixture(scope='module')
+def magatzem(tmp_path_factory):
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_hist = simular_6_anys_variable(llegir_inscrits('sorteig.csv').head(400), [20] * 3,
+                                          seed=1, output_csv=None)
+    arrel = str(tmp_path_factory.mktemp('historial'))
+    desar_historial(df_hist, arrel, 'esc_a', 42)
+    desar_historial(df_hist, arrel, 'esc_b', 7)
+    return arrel, len(df_hist) // 3
+
+
+@pytest.mark.parametrize('filtres, escenaris, seeds, anys', [
+    ({'escenari': 'esc_a'}, {'esc_a'}, {42}, {1, 2, 3}),
+    ({'seed': 42}, {'esc_a'}, {42}, {1, 2, 3}),
+    ({'anys': [1, 2]}, {'esc_a', 'esc_b'}, {7, 42}, {1, 2}),
+    ({'escenari': 'esc_b', 'seed': 7, 'anys': [3]}, {'esc_b'}, {7}, {3}),
+])
+def test_filtres_del_magatzem(magatzem, filtres, escenaris, seeds, anys):
+    arrel, files_per_any = magatzem
+    df = llegir_historial(arrel, **filtres)
+
+    assert set(df['escenari'].astype(str)) == escenaris
+    assert set(df['seed']) == seeds
+    assert set(df['any']) == anys
+    assert len(df) == files_per_any * len(escenaris) * len(anys)
+
+
+def test_particions_del_magatzem(magatzem, tmp_path):
+    arrel, _ = magatzem
+    assert particions_historial(arrel) == [('esc_a', 42), ('esc_b', 7)]
+    assert particions_historial(str(tmp_path / 'no_existeix')) == []
@@ -0,0 +1,103 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from modules.generador import generar_dades_inicials
+from modules.simulacio import simular_6_anys_variable, simular_arbre_escenaris, reprendre_simulacio
+from modules.escombrat import expandir_graella, executar_variant, executar_grup
+
+# Rotació només a partir de l'any 3
+NOUS_PER_ANY = [(0, 0), (0, 0), (5, 20), (5, 20), (5, 20), (5, 20)]
+
+
+@pytest.fixture(scope='module')
+def poblacio(tmp_path_factory):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generar_dades_inicials(175, 190, output_path=str(tmp_path_factory.mktemp('dades') / 'p.csv'),
+                                      seed=3)
+
+
+def _sol(poblacio, escenari):
+    return simular_6_anys_variable(
+        poblacio, escenari['captures_per_any'], seed=7,
+        min_colla_size=escenari['min_colla'],
+        new_hunters_range=escenari['new_hunters_per_year'],
+        retired_hunters_range=escenari['retired_hunters_per_year'],
+        output_csv=None
+    )
+
+
+def test_arbre_identic_a_la_simulacio_sola_amb_rangs_per_any(poblacio):
+    escenaris = [
+        dict(nom='fix', captures_per_any=[150] * 6, min_colla=8,
+             new_hunters_per_year=(1, 10), retired_hunters_per_year=(1, 10)),
+        dict(nom='per_any', captures_per_any=[150] * 6, min_colla=8,
+             new_hunters_per_year=NOUS_PER_ANY, retired_hunters_per_year=(1, 10)),
+    ]
+    with contextlib.redirect_stdout(io.StringIO()):
+        arbre = simular_arbre_escenaris(poblacio, escenaris, seed=7)
+        sols = {e['nom']: _sol(poblacio, e) for e in escenaris}
+
+    for nom, df_hist in sols.items():
+        pd.testing.assert_frame_equal(arbre[nom], df_hist)
+    # La rotació per any s'aplica: a partir de l'any 3 hi ha caçadors nous
+    assert not arbre['per_any'].equals(arbre['fix'])
+
+
+def test_escombrat_amb_rangs_per_any_igual_en_grup_i_sol():
+    variants = expandir_graella({
+        'colla': {'min8': [8, 20]},
+        'captures': {'c150': [150] * 6},
+        'rotacio': {'sense': [[0, 0], [0, 0]], 'tardana': [NOUS_PER_ANY, [1, 10]]},
+        'poblacio': {'p': [175, 190]},
+        'seeds': [2],
+    })
+    assert variants[1]['new_hunters_per_year'] == NOUS_PER_ANY
+
+    en_grup = executar_grup(variants)
+    soles = [executar_variant(v) for v in variants]
+    for a, b in zip(en_grup, soles):
+        a.pop('segons'), b.pop('segons')
+        assert a == b
+
+
+def test_rangs_per_any_com_a_llistes_de_json(poblacio):
+    escenari = dict(captures_per_any=[150] * 6, min_colla=8, retired_hunters_per_year=(1, 10))
+    with contextlib.redirect_stdout(io.StringIO()):
+        tuples = _sol(poblacio, dict(escenari, new_hunters_per_year=NOUS_PER_ANY))
+        llistes = _sol(poblacio, dict(escenari, new_hunters_per_year=[list(r) for r in NOUS_PER_ANY]))
+    pd.testing.assert_frame_equal(tuples, llistes)
+
+
+@pytest.mark.parametrize('rang', [NOUS_PER_ANY[:4], [5, 20, 30]])
+def test_rangs_per_any_invalids(poblacio, rang):
+    escenari = dict(nom='curt', captures_per_any=[150] * 6, min_colla=8,
+                    new_hunters_per_year=rang, retired_hunters_per_year=(1, 10))
+    with contextlib.redirect_stdout(io.StringIO()):
+        with pytest.raises(ValueError):
+            _sol(poblacio, escenari)
+        with pytest.raises(ValueError):
+            simular_arbre_escenaris(poblacio, [escenari], seed=7)
+
+
+def test_reprendre_des_d_un_checkpoint_igual_que_sense_interrupcio(poblacio, tmp_path):
+    captures = [150, 60, 150, 120, 90, 150, 30, 150]
+    params = dict(seed=11, min_colla_size=8, new_hunters_range=(1, 10),
+                  retired_hunters_range=NOUS_PER_ANY + [(5, 20)] * 2, output_csv=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        seguit = simular_6_anys_variable(poblacio, captures, **params)
+
+        # Represa a mitja simulació (des de l'any 2 d'una execució completa)
+        simular_6_anys_variable(poblacio, captures, checkpoint_dir=str(tmp_path / 'complet'), **params)
+        represa = reprendre_simulacio(str(tmp_path / 'complet'), captures, any_checkpoint=2, output_csv=None)
+
+        # Una execució de 4 anys allargada fins a 8
+        simular_6_anys_variable(poblacio, captures[:4], checkpoint_dir=str(tmp_path / 'curt'),
+                                **dict(params, retired_hunters_range=(1, 10)))
+        allargada = reprendre_simulacio(str(tmp_path / 'curt'), captures, output_csv=None)
+        seguit_fix = simular_6_anys_variable(poblacio, captures, **dict(params, retired_hunters_range=(1, 10)))
+
+    pd.testing.assert_frame_equal(represa, seguit)
+    pd.testing.assert_frame_equal(allargada, seguit_fix)
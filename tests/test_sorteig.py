@@ -0,0 +1,144 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.sorteig import (
+    repartir_sobrants_colles,
+    assignar_isards_sorteig,
+    assignar_isards_sorteig_csv,
+    assignar_isards_sorteig_replicas,
+)
+
+
+def _poblacio(llavor: int, n_colles: int = 12, n_individuals: int = 60) -> pd.DataFrame:
+    """Inscrits amb mides de colla, Prioritat i anys_sense_captura variats (hi ha empats)."""
+    rng = np.random.RandomState(llavor)
+    mides = rng.randint(3, 16, size=n_colles)
+    n = int(mides.sum()) + n_individuals
+    return pd.DataFrame({
+        'ID': np.arange(1, n + 1),
+        'Modalitat': ['A'] * int(mides.sum()) + ['B'] * n_individuals,
+        'Prioritat': rng.choice([2, 3, 4, 5], size=n),
+        'Colla_ID': [f'Colla_{c + 1}' for c, m in enumerate(mides) for _ in range(m)] + [None] * n_individuals,
+        'anys_sense_captura': rng.randint(0, 4, size=n),
+    })
+
+
+def _sobrants_original(caçadors, assignats, sobrants, rng):
+    """Bucle de repartiment de sobrants de la versió original (pandas, np.isclose i sample)."""
+    colles_df = pd.DataFrame({'Colla_ID': np.arange(len(caçadors)), 'caçadors': caçadors,
+                              'assignats': assignats})
+    for _ in range(sobrants):
+        colles_df['rati'] = colles_df['assignats'] / colles_df['caçadors']
+        min_rati = colles_df['rati'].min()
+        candidates = colles_df[np.isclose(colles_df['rati'], min_rati, atol=1e-6)]
+        selected = candidates.sample(n=1, random_state=rng)
+        colla_id = selected['Colla_ID'].values[0]
+        colles_df.loc[colles_df['Colla_ID'] == colla_id, 'assignats'] += 1
+    return colles_df['assignats'].to_numpy()
+
+
+def _sorteig_original(df: pd.DataFrame, total_captures: int, seed: int) -> np.ndarray:
+    """Sorteig de la versió original (bucles per colla i per passada), com a referència."""
+    rng = np.random.RandomState(seed)
+    df = df.copy()
+    df['adjudicats'] = 0
+    df_colla = df[df['Modalitat'] == 'A']
+    n_indiv_applicants = int((df['Modalitat'] == 'B').sum())
+    total_applicants = len(df_colla) + n_indiv_applicants
+    ratio = math.ceil(total_applicants / total_captures)
+    n_indiv = round(total_captures * n_indiv_applicants / total_applicants)
+    n_colla = total_captures - n_indiv
+
+    colles_df = df_colla.groupby('Colla_ID').size().reset_index(name='caçadors')
+    floor = (colles_df['caçadors'] // ratio).astype(int).to_numpy()
+    colles_df['assignats'] = _sobrants_original(colles_df['caçadors'].to_numpy(), floor,
+                                                n_colla - floor.sum(), rng)
+
+    def assignar(membres, n_assign):
+        while n_assign > 0:
+            adjudicacions = df.loc[membres, 'adjudicats']
+            group = df.loc[adjudicacions.index[adjudicacions == adjudicacions.min()]].copy()
+            if group.empty:
+                break
+            group['rand'] = rng.random(size=len(group))
+            sorted_group = group.sort_values(by=['Prioritat', 'anys_sense_captura', 'rand'],
+                                             ascending=[True, False, True])
+            n_to_assign = min(n_assign, len(sorted_group))
+            df.loc[sorted_group.index[:n_to_assign], 'adjudicats'] += 1
+            n_assign -= n_to_assign
+
+    for _, row in colles_df.iterrows():
+        assignar(df.index[(df['Modalitat'] == 'A') & (df['Colla_ID'] == row['Colla_ID'])],
+                 int(row['assignats']))
+    if n_indiv > 0:
+        assignar(df.index[df['Modalitat'] == 'B'], n_indiv)
+    return df['adjudicats'].to_numpy()
+
+
+@pytest.mark.parametrize('caçadors, assignats, sobrants, seed', [
+    ([5, 5, 5, 5], [0, 0, 0, 0], 3, 1),
+    ([3, 6, 9, 12, 4], [1, 2, 3, 4, 1], 7, 2),
+    ([7, 14, 10, 10, 3, 5], [0, 1, 0, 0, 0, 1], 25, 3),
+    ([8] * 20, [1] * 20, 19, 4),
+])
+def test_sobrants_colles_iguals_a_l_original(caçadors, assignats, sobrants, seed):
+    nou = repartir_sobrants_colles(np.array(caçadors), np.array(assignats), sobrants,
+                                   np.random.RandomState(seed))
+    original = _sobrants_original(np.array(caçadors), np.array(assignats), sobrants,
+                                  np.random.RandomState(seed))
+    np.testing.assert_array_equal(nou, original)
+
+
+# IDs adjudicats per la versió original a test_sorteig_fixat
+IDS_ADJUDICATS_FIXATS = [9, 12, 13, 14, 21, 22, 26, 28, 30]
+
+# (llavor de la població, captures, llavor del sorteig); l'últim cas té més
+# captures que caçadors i reparteix diverses passades a cada grup
+CASOS = [(1, 40, 42), (2, 7, 1), (3, 1, 5), (4, 150, 9), (5, 900, 3)]
+
+
+@pytest.mark.parametrize('poblacio, captures, seed', CASOS)
+def test_sorteig_igual_a_l_original(poblacio, captures, seed):
+    df = _poblacio(poblacio)
+    resultat = assignar_isards_sorteig(df, captures, seed=seed)
+
+    np.testing.assert_array_equal(resultat['adjudicats'].to_numpy(), _sorteig_original(df, captures, seed))
+    assert resultat['adjudicats'].sum() == captures
+    np.testing.assert_array_equal(resultat['nova_prioritat'], np.where(resultat['adjudicats'] == 1, 4, 2))
+
+
+def test_sorteig_fixat():
+    # Resultat de la versió original per a una població petita i la llavor 42
+    df = _poblacio(0, n_colles=3, n_individuals=8)
+    resultat = assignar_isards_sorteig(df, 9, seed=42)
+    assert resultat.loc[resultat['adjudicats'] > 0, 'ID'].tolist() == IDS_ADJUDICATS_FIXATS
+
+
+def test_sorteig_csv_igual_al_de_memoria(tmp_path):
+    df = _poblacio(6)
+    entrada = tmp_path / 'sorteig.csv'
+    sortida = tmp_path / 'resultats.csv'
+    df.to_csv(entrada, sep=';', index=False)
+
+    resultat = assignar_isards_sorteig_csv(str(entrada), 60, output_csv=str(sortida), seed=11)
+    en_memoria = assignar_isards_sorteig(df, 60, seed=11)
+
+    np.testing.assert_array_equal(resultat['adjudicats'], en_memoria['adjudicats'])
+    desat = pd.read_csv(sortida)
+    np.testing.assert_array_equal(desat['adjudicats'], en_memoria['adjudicats'])
+    np.testing.assert_array_equal(desat['nou_anys_sense_captura'], en_memoria['nou_anys_sense_captura'])
+
+
+@pytest.mark.parametrize('poblacio, captures', [(1, 40), (3, 1), (5, 900)])
+def test_replicas_iguals_a_sortejos_sols(poblacio, captures):
+    df = _poblacio(poblacio)
+    seeds = [0, 1, 7, 42, 12345]
+    # Un bloc petit obliga a processar les rèpliques en diversos blocs
+    replicas = assignar_isards_sorteig_replicas(df, captures, seeds, mida_bloc=2 * len(df))
+
+    assert replicas.shape == (len(seeds), len(df))
+    for fila, seed in zip(replicas, seeds):
+        np.testing.assert_array_equal(fila, assignar_isards_sorteig(df, captures, seed=seed)['adjudicats'])